@@ -0,0 +1,134 @@
+# Пакетний експорт блок-схем: кожна блок-схема растеризується один раз,
+# і результат використовується для всіх растрових форматів та багатосторінкового PDF
+from flowchart_generator import generate_flowcharts_from_file, update_global_settings, global_settings
+
+# Підтримувані формати експорту
+FORMATS = ("png", "jpg", "svg", "dot", "pdf")
+
+# Формати, для яких потрібна растеризація
+RASTER_FORMATS = ("png", "jpg", "pdf")
+
+# Масштаб растеризації за замовчуванням: сторінки PDF є растровими зображеннями,
+# тому при масштабі 1 (72 dpi) вони нечіткі при друку; масштаб 2 дає 144 dpi
+DEFAULT_SCALE = 2.0
+
+# Перевірка списку форматів (ValueError для непідтримуваних)
+def check_formats(formats):
+    unsupported = [format for format in formats if format not in FORMATS]
+    if unsupported:
+        raise ValueError(f"Непідтримувані формати: {', '.join(unsupported)} (підтримуються: {', '.join(FORMATS)})")
+
+# Растеризація SVG у зображення PIL
+def rasterize(svg_path, scale=1.0):
+    import io
+    import cairosvg
+    from PIL import Image
+    image = Image.open(io.BytesIO(cairosvg.svg2png(url=svg_path, scale=scale)))
+    image.load()
+    return image
+
+# Експорт однієї блок-схеми у кілька форматів; base_path - шлях без розширення.
+# Готове зображення (наприклад, з перегляду) можна передати через image, тоді растеризація не виконується.
+# Повертає растрове зображення (або None) для подальшого використання, наприклад у PDF
+def export_chart(svg_path, base_path, formats, image=None, scale=DEFAULT_SCALE):
+    import os
+    import shutil
+    check_formats(formats)
+    if image is None and any(format in RASTER_FORMATS for format in formats):
+        image = rasterize(svg_path, scale)
+    for format in formats:
+        file_path = f"{base_path}.{format}"
+        if format == 'svg':
+            if os.path.abspath(svg_path) != os.path.abspath(file_path):
+                shutil.copy(svg_path, file_path)
+        elif format == 'png':
+            image.save(file_path, 'PNG')
+        elif format == 'jpg':
+            image.convert('RGB').save(file_path, 'JPEG')
+        elif format == 'pdf':
+            image.convert('RGB').save(file_path, 'PDF', resolution=72 * scale)
+        elif format == 'dot':
+            # Код DOT зберігається генератором поруч із SVG
+            dot_path = f"{os.path.splitext(svg_path)[0]}.dot"
+            if os.path.abspath(dot_path) != os.path.abspath(file_path):
+                shutil.copy(dot_path, file_path)
+    return image
+
+# Експорт усіх функцій файлу C: окремі файли для кожної функції у <output_dir>/<name>/
+# та багатосторінковий PDF <output_dir>/<name>.pdf (по сторінці на функцію);
+# name - шлях файлу без розширення відносно спільного каталогу (за замовчуванням - ім'я файлу).
+# Сторінки PDF дописуються по одній, тому в пам'яті зберігається лише поточна блок-схема.
+# Виконується у процесі-воркері; повертає список створених файлів
+def export_file(c_path, output_dir, formats=("png", "pdf", "svg"), scale=DEFAULT_SCALE, function_index=None, settings=None, name=None):
+    import os
+    check_formats(formats)
+    if settings:
+        update_global_settings(settings)
+    name = name or os.path.splitext(os.path.basename(c_path))[0]
+    chart_dir = os.path.join(output_dir, name)
+    pdf_path = os.path.join(output_dir, f"{name}.pdf")
+    chart_formats = [format for format in formats if format in ("png", "jpg", "svg", "dot")]
+    written = []
+    page_count = 0
+    for svg_path in generate_flowcharts_from_file(c_path, chart_dir, function_index):
+        base_path = os.path.splitext(svg_path)[0]
+        image = export_chart(svg_path, base_path, chart_formats, scale=scale) if chart_formats else None
+        if 'pdf' in formats:
+            page = (image or rasterize(svg_path, scale)).convert('RGB')
+            page.save(pdf_path, 'PDF', resolution=72 * scale, append=page_count > 0)
+            page_count += 1
+        written.extend(f"{base_path}.{format}" for format in chart_formats)
+        # Видалення проміжних файлів, які не запитувались
+        for intermediate_path in (base_path, f"{base_path}.dot", svg_path):
+            if os.path.exists(intermediate_path) and intermediate_path not in (f"{base_path}.{format}" for format in formats):
+                os.remove(intermediate_path)
+    if page_count:
+        written.append(pdf_path)
+    return written
+
+# Імена результатів для файлів: шляхи без розширення відносно спільного каталогу,
+# щоб файли з однаковими іменами з різних каталогів (a/util.c, b/util.c) не перезаписували один одного
+def export_names(c_paths):
+    import os
+    paths = [os.path.abspath(c_path) for c_path in c_paths]
+    if len(set(paths)) < len(paths):
+        raise ValueError("Файл вказано кілька разів")
+    common_dir = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return {c_path: os.path.splitext(os.path.relpath(path, common_dir))[0] for c_path, path in zip(c_paths, paths)}
+
+# Пакетний експорт кількох файлів C паралельно; повертає {файл: список створених файлів}
+def export_files(c_paths, output_dir, formats=("png", "pdf", "svg"), scale=DEFAULT_SCALE, workers=None, function_index=None):
+    from concurrent.futures import ProcessPoolExecutor
+    check_formats(formats)
+    settings = dict(global_settings)
+    names = export_names(c_paths)
+    if len(c_paths) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {c_path: pool.submit(export_file, c_path, output_dir, formats, scale, function_index, settings, names[c_path]) for c_path in c_paths}
+            return {c_path: future.result() for c_path, future in futures.items()}
+    return {c_path: export_file(c_path, output_dir, formats, scale, function_index, name=names[c_path]) for c_path in c_paths}
+
+# Пакетний експорт з командного рядка
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Пакетний експорт блок-схем усіх функцій файлів C")
+    parser.add_argument("files", nargs="+", help="Файли C")
+    parser.add_argument("-o", "--output", default="flowcharts", help="Каталог для результатів")
+    parser.add_argument("-f", "--formats", default="png,pdf,svg", help=f"Формати через кому ({', '.join(FORMATS)})")
+    parser.add_argument("-s", "--scale", type=float, default=DEFAULT_SCALE,
+                        help="Масштаб растеризації PNG, JPG і сторінок PDF (PDF містить растрові зображення з роздільністю 72 dpi x масштаб: "
+                             "більший масштаб дає чіткіший друк, але більший файл)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Кількість процесів")
+    args = parser.parse_args()
+
+    formats = tuple(format.strip().lower() for format in args.formats.split(",") if format.strip())
+    try:
+        check_formats(formats)
+    except ValueError as e:
+        parser.error(str(e))
+    results = export_files(args.files, args.output, formats, args.scale, args.jobs)
+    for c_path, written in results.items():
+        print(f"{c_path}: {len(written)} файлів")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 # Для коректної роботи з інтерфейсом, цей код має бути збережений в файлі flowchart_generator.py
+import threading
+from functools import lru_cache
 
 # Налаштування за замовчуванням
 global_settings = {
@@ -14,56 +16,318 @@ global_settings = {
     "loopback_arrows": "normal",
     "nodesep": 0,
     "width_factor": 16,  # Встановити значення ширини тексту за замовчуванням 1s6
+    "auto_size": False,  # Розмір блоків за виміряною шириною тексту (не більший за розмір блоку в сітці розміщення)
     "start_end_height": 0.5,
     "special_shape_width": 2.0,
     "loop_edge_weight": 55,
     "edge_weight": 50,
     "online_mode": False,
     "branch_spacing": 3,  # Відстань між гілками за замовчуванням
-    "overlap": "true"
+    "overlap": "true",
+    "minify_svg": False  # Мініфікація SVG після рендерингу
 }
 
+# Спільний парсер C (створення таблиць парсера - найдовша частина першої генерації)
+c_parser_instance = None
+c_parser_lock = threading.Lock()
+
+# Функція для розбору C-коду спільним парсером (потокобезпечна)
+def parse_code(c_code):
+    global c_parser_instance
+    with c_parser_lock:
+        if c_parser_instance is None:
+            from pycparser import c_parser
+            c_parser_instance = c_parser.CParser()
+        return c_parser_instance.parse(c_code)
+
+# Попереднє завантаження парсера та Graphviz (наприклад, у фоновому потоці при запуску інтерфейсу):
+# рендеринг мінімального графа тим самим рушієм завантажує виконуваний файл і плагіни Graphviz,
+# тому перша справжня генерація не чекає на їх завантаження
+def warm_up():
+    import graphviz
+    import font_metrics
+    parse_code("int main() { return 0; }")
+    graph = graphviz.Digraph(engine='fdp')
+    graph.node('warm_up', pos="0,0!")
+    graph.pipe(format='svg')
+
 # Функція для оновлення глобальних налаштувань
 def update_global_settings(new_settings):
     global global_settings
     global_settings.update(new_settings)
 
-# Попередня обробка C-коду
+# Попередня обробка C-коду: коментарі, директиви препроцесора та директиви using видаляються,
+# але їх переноси рядків залишаються, тому номери рядків збігаються з вихідним кодом
 def preprocess_code(c_code):
     import re
-    # Видалення коментарів типу //
-    c_code = re.sub(r'//.*?$', '', c_code, flags=re.MULTILINE)
-    # Видалення коментарів типу /* */
-    c_code = re.sub(r'/\*.*?\*/', '', c_code, flags=re.DOTALL)
-    # Видалення директив препроцесора
-    c_code = "\n".join(line for line in c_code.splitlines() if not line.strip().startswith("#"))
-    # Видалення директив using
-    c_code = "\n".join(line for line in c_code.splitlines() if not line.strip().startswith("using"))
-    return c_code
+
+    def remove_comment(match):
+        text = match.group()
+        if text[:1] in '"\'':
+            return text
+        if '\n' in text:
+            return '\n' * text.count('\n')
+        # Коментар між двома лексемами (int/**/x) залишається роздільником
+        before = c_code[match.start() - 1:match.start()]
+        after = c_code[match.end():match.end() + 1]
+        return ' ' if before and after and not before.isspace() and not after.isspace() else ''
+
+    c_code = re.sub(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*.*?\*/', remove_comment, c_code, flags=re.DOTALL)
+    return re.sub(r'^[ \t]*(?:#|using\b)(?:\\\r?\n|[^\n])*', lambda match: '\n' * match.group().count('\n'), c_code, flags=re.MULTILINE)
+
+# Лексеми, важливі для пошуку меж елементів верхнього рівня: рядки, символи,
+# коментарі та директиви препроцесора пропускаються цілком, щоб дужки в них не враховувались
+TOP_LEVEL_TOKENS = rb'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*.*?\*/|^[ \t]*#(?:\\\r?\n|[^\n])*|[{};]'
+
+# Очищення заголовка елемента верхнього рівня від коментарів та директив препроцесора
+def clean_header(header):
+    import re
+    header = re.sub(rb'/\*.*?\*/|//[^\n]*', b' ', header, flags=re.DOTALL)
+    header = re.sub(rb'^[ \t]*#(?:\\\r?\n|[^\n])*', b'', header, flags=re.MULTILINE)
+    return header.decode('utf-8', errors='replace').strip()
+
+# Індекс дужки "(", парної до ")" в кінці тексту (None, якщо дужки не збалансовані)
+def matching_paren(text):
+    depth = 0
+    for index in range(len(text) - 1, -1, -1):
+        if text[index] == ')':
+            depth += 1
+        elif text[index] == '(':
+            depth -= 1
+            if depth == 0:
+                return index
+    return None
+
+# Атрибути компілятора, що можуть стояти після списку параметрів
+HEADER_SUFFIXES = ("__attribute__", "__asm__", "__asm", "asm", "__declspec")
+
+# Ім'я функції з її заголовка: ідентифікатор перед списком параметрів, яким закінчується заголовок.
+# Для функцій, що повертають вказівник на функцію (int (*get(int x))(void)), ім'я шукається всередині дужок
+def header_function_name(header):
+    import re
+    declarator = header.strip()
+    while declarator.endswith(')'):
+        params_start = matching_paren(declarator)
+        if params_start is None:
+            return None
+        before = declarator[:params_start].rstrip()
+        if before.endswith(')'):
+            group_start = matching_paren(before)
+            if group_start is None:
+                return None
+            # Дужки після ідентифікатора - атрибут (__attribute__((...))) або вкладений декларатор
+            attribute = re.search(r'(\w+)\s*$', before[:group_start])
+            if attribute and attribute.group(1) in HEADER_SUFFIXES:
+                declarator = before[:attribute.start()].rstrip()
+            else:
+                declarator = before[group_start + 1:-1].strip()
+            continue
+        match = re.search(r'(\w+)$', before)
+        if not match:
+            return None
+        if match.group(1) in HEADER_SUFFIXES:
+            declarator = before[:match.start()].rstrip()
+            continue
+        return match.group(1)
+    # Ім'я у дужках без списку параметрів після нього (залишок вкладеного декларатора)
+    match = re.search(r'(\w+)$', declarator)
+    return match.group(1) if match else None
+
+# Розбиття коду на елементи верхнього рівня без повного розбору.
+# buffer - байтовий об'єкт (bytes, mmap); повертає генератор кортежів
+# (вид, ім'я функції, початок, кінець), де вид - "function" або "declaration".
+# Копіюються лише заголовки елементів, тому працює і для відображених у пам'ять файлів
+def split_top_level(buffer):
+    import re
+    depth = 0
+    start = 0
+    brace_open = None
+    for match in re.finditer(TOP_LEVEL_TOKENS, buffer, flags=re.DOTALL | re.MULTILINE):
+        token = match.group()
+        if token == b'{':
+            if depth == 0 and brace_open is None:
+                brace_open = match.start()
+            depth += 1
+        elif token == b'}':
+            depth = max(depth - 1, 0)
+            if depth == 0 and brace_open is not None:
+                header = clean_header(buffer[start:brace_open])
+                if header.endswith(')'):
+                    yield "function", header_function_name(header), start, match.end()
+                    start = match.end()
+                    brace_open = None
+        elif token == b';' and depth == 0:
+            yield "declaration", None, start, match.end()
+            start = match.end()
+            brace_open = None
+    # Незавершений елемент у кінці коду
+    if buffer[start:].strip():
+        header = clean_header(buffer[start:brace_open]) if brace_open is not None else ""
+        if header.endswith(')'):
+            yield "function", header_function_name(header), start, len(buffer)
+        else:
+            yield "declaration", None, start, len(buffer)
+
+# Коментарі, директиви препроцесора та пробіли на початку елемента верхнього рівня
+LEADING_TRIVIA = rb'(?:\s+|/\*.*?\*/|//[^\n]*|^[ \t]*#(?:\\\r?\n|[^\n])*)*'
+
+# Перевірка, чи оголошення buffer[start:end] визначає тип (потрібне для розбору функцій, що йдуть далі).
+# Рішення приймається за початком оголошення без копіювання всього тексту,
+# тому великі таблиці даних не потрапляють у пам'ять
+def is_type_declaration(buffer, start, end):
+    import re
+    start = re.compile(LEADING_TRIVIA, flags=re.DOTALL | re.MULTILINE).match(buffer, start, end).end()
+    keyword = re.match(rb'\w+', buffer[start:start + 16])
+    if not keyword:
+        return False
+    if keyword.group() == b"typedef":
+        return True
+    if keyword.group() not in (b"struct", b"union", b"enum"):
+        return False
+    # Змінна структурного типу з ініціалізатором ("struct s x = {...};") - не визначення типу
+    body_start = buffer.find(b'{', start, end)
+    return buffer.find(b'=', start, body_start if body_start != -1 else end) == -1
+
+# Ім'я функції, що містить позицію offset (у символах) коду; None - поза функціями
+def function_at(c_code, offset):
+    buffer = c_code.encode('utf-8')
+    byte_offset = len(c_code[:offset].encode('utf-8'))
+    for kind, name, start, end in split_top_level(buffer):
+        if kind == "function" and start <= byte_offset <= end:
+            return name
+    return None
+
+# Функції коду з визначеннями типів, що йдуть перед ними: генератор пар (ім'я, код функції з прелюдією),
+# кожну з яких можна розібрати окремо. buffer - байтовий об'єкт (bytes, mmap); names - потрібні функції (None - усі)
+def function_sources(buffer, names=None):
+    # Переноси рядків нормалізуються, як при читанні файлу в текстовому режимі (файли з CRLF)
+    def source(start, end):
+        return buffer[start:end].decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+
+    prelude = []
+    for kind, name, start, end in split_top_level(buffer):
+        if kind == "declaration":
+            if is_type_declaration(buffer, start, end):
+                prelude.append(source(start, end))
+        elif name and (names is None or name in names):
+            yield name, "\n".join(prelude) + "\n" + source(start, end)
+
+# Код однієї функції з визначеннями типів перед нею: розбирається лише ця функція,
+# а не весь код. Повертає None, якщо функцію не знайдено
+def function_source(c_code, name):
+    return next((code for chunk_name, code in function_sources(c_code.encode('utf-8'), {name})), None)
+
+# Заміна коментарів та директив препроцесора пробілами зі збереженням переносів рядків,
+# щоб зміщення та номери рядків збігались з вихідним кодом
+def blank_preprocess(buffer):
+    import re
+
+    def blank(match):
+        return re.sub(rb'[^\n]', b' ', match.group())
+
+    buffer = re.sub(rb'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*.*?\*/',
+                    lambda match: match.group() if match.group()[:1] in b'"\'' else blank(match), buffer, flags=re.DOTALL)
+    return re.sub(rb'^[ \t]*(?:#|using\b)(?:\\\r?\n|[^\n])*', blank, buffer, flags=re.MULTILINE)
+
+# Розбір одного елемента верхнього рівня; повертає None або (рядок, стовпець, повідомлення) помилки
+# (рядок - відносно переданого коду). Результати кешуються, тому незмінені функції при редагуванні
+# повторно не розбираються, навіть якщо вони зсунулись у файлі
+@lru_cache(maxsize=512)
+def check_chunk(c_code):
+    import re
+    try:
+        parse_code(c_code)
+        return None
+    except Exception as e:
+        match = re.match(r'[^:]*:(\d+)(?::(\d+))?:\s*(.*)', str(e))
+        if match:
+            return int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        # Помилка без координат (наприклад, неочікуваний кінець коду) - останній рядок
+        return c_code.rstrip().count('\n') + 1, 0, str(e).lstrip(': ')
+
+# Заголовок нової функції на початку рядка (для відновлення після незакритої дужки)
+FUNCTION_HEADER_LINE = rb'^[A-Za-z_][\w \t\*]*\([^;{}()]*\)[ \t]*(?:\{|$)'
+
+# Стійкий до помилок розбір: кожен елемент верхнього рівня перевіряється окремо
+# (з попередніми коректними оголошеннями як прелюдією).
+# last_good - словник останніх коректних версій функцій (ім'я -> код), що оновлюється між викликами:
+# замість функції з помилкою у результат підставляється її остання коректна версія,
+# тому редагування однієї функції не змінює блок-схему, доки функція знову не стане коректною.
+# Повертає (код лише з коректних елементів, список помилок (ім'я функції, рядок, стовпець, повідомлення))
+def check_functions(c_code, last_good=None):
+    import re
+    source = c_code.encode('utf-8')
+    blanked = blank_preprocess(source)
+    chunks = list(split_top_level(blanked))
+    valid_parts = []
+    prelude = b""
+    errors = []
+    while chunks:
+        kind, name, start, end = chunks.pop(0)
+        # Ключ кешу - лише текст елемента без початкових порожніх рядків, тому зсув елемента у файлі
+        # не спричиняє повторного розбору
+        text = blanked[start:end].lstrip()
+        text_start = end - len(text)
+        error = check_chunk((prelude + b'\n' + text).decode('utf-8', errors='replace'))
+        if error is None:
+            valid_parts.append(source[text_start:end])
+            if kind == "declaration":
+                prelude += b'\n' + text
+            elif name and last_good is not None:
+                last_good[name] = source[text_start:end]
+            continue
+        # Незакрита дужка поглинає наступні функції: розбиття на наступному заголовку функції
+        if kind == "function":
+            body_start = text.find(b'{')
+            recovery = next((match.start() for match in re.finditer(FUNCTION_HEADER_LINE, text, flags=re.MULTILINE)
+                             if body_start != -1 and match.start() > body_start), None)
+            if recovery is not None:
+                rest = [(sub_kind, sub_name, text_start + recovery + sub_start, text_start + recovery + sub_end)
+                        for sub_kind, sub_name, sub_start, sub_end in split_top_level(text[recovery:])]
+                chunks[:0] = [(kind, name, start, text_start + recovery)] + rest
+                continue
+        # Номер рядка помилки у вихідному коді (елемент починається з рядка, наступного за прелюдією)
+        first_line = blanked.count(b'\n', 0, text_start) + 1
+        errors.append((name, max(error[0] - prelude.count(b'\n') - 2, 0) + first_line, error[1], error[2]))
+        if name and last_good is not None and name in last_good:
+            valid_parts.append(last_good[name])
+    return b"\n".join(valid_parts).decode('utf-8'), errors
 
 # Генерація блок-схеми
-def generate_flowchart(c_code):
+# function_index - імена користувацьких функцій з інших файлів проєкту,
+# functions - імена функцій, для яких будуються блок-схеми (None - для всіх),
+# output_path - шлях до результату без розширення (None - тимчасовий каталог),
+# layout_file - шлях або файловий об'єкт для потокового експорту розміщення у JSON,
+# render - чи будувати SVG через Graphviz (без нього повертається лише DOT і шлях до JSON),
+# stats - словник, у який записується статистика генерації ("minify_svg": розміри SVG до і після мініфікації)
+def generate_flowchart(c_code, function_index=None, functions=None, output_path=None, layout_file=None, render=True, stats=None):
     import os
-    import requests
+    import json
+    import hashlib
     import textwrap
     from graphviz import Digraph
-    from pycparser import c_parser, c_ast
+    from pycparser import c_ast
+    from font_metrics import fit_label
 
     # Створення тимчасового каталогу для збереження файлів
     temp_dir = os.path.join(os.getcwd(), 'temp')
-    os.makedirs(temp_dir, exist_ok=True)
+    if output_path is None:
+        os.makedirs(temp_dir, exist_ok=True)
+        output_path = os.path.join(temp_dir, 'flowchart')
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
     
     # Попередня обробка C-коду
     c_code = preprocess_code(c_code)
     
     # Парсинг C-коду
-    parser = c_parser.CParser()
-    ast = parser.parse(c_code)
+    ast = parse_code(c_code)
 
-    # Збереження AST у файл для подальшого використання
-    ast_file_path = os.path.join(temp_dir, 'ast.txt')
-    with open(ast_file_path, 'w') as ast_file:
-        ast_file.write(str(ast))
+    # Збереження AST у файл для подальшого використання (лише для інтерфейсу)
+    if render and output_path == os.path.join(temp_dir, 'flowchart'):
+        ast_file_path = os.path.join(temp_dir, 'ast.txt')
+        with open(ast_file_path, 'w') as ast_file:
+            ast_file.write(str(ast))
 
     # Створення об'єкту блок-схеми
     dot = Digraph(engine='fdp')
@@ -75,7 +339,11 @@ def generate_flowchart(c_code):
     node_counter = 0
     y_position = 0
     max_depth_y = y_position
-    function_names = set()
+    function_names = set(function_index or ())
+    cluster_layout = None  # Розміщення блоків і з'єднань поточної функції для експорту в JSON
+    emitted = []  # Журнал доданих блоків і з'єднань поточної функції
+    fragments = {}  # Записані фрагменти блок-схеми для структурно однакових піддерев
+    subtree_keys = {}  # Структурні ключі піддерев AST (за id вузла)
     
     # Витягнення імен функцій з AST
     for ext in ast.ext:
@@ -83,13 +351,23 @@ def generate_flowchart(c_code):
             function_names.add(ext.decl.name)
 
     # Функція для додавання блоку до блок-схеми
-    def add_node(label, shape='rectangle', width=None, height=None, cluster=None, fontsize=None, pos=None, x=12):
-        nonlocal node_counter, y_position, max_depth_y
+    def add_node(label, shape='rectangle', width=None, height=None, cluster=None, fontsize=None, pos=None, x=12, lines=None):
+        nonlocal y_position, max_depth_y
         width = width or global_settings["node_width"]
         height = height or global_settings["node_height"]
         fontsize = fontsize or global_settings["node_fontsize"]
-        wrapped_label = wrap_label(label)
-        node_id = f"node{node_counter}"
+        if global_settings["auto_size"] and shape != 'point':
+            # Позиції блоків закріплені в сітці з кроком 1.5, тому блок лише зменшується до тексту
+            # і не перевищує заданого розміру; текст, що не вміщується, зменшується
+            text = label.strip('| ').replace(r"\n", " ") if shape == 'record' else label
+            label_lines, fontsize, fit_width, fit_height = fit_label(text, width, height, fontsize, shape)
+            wrapped_label = r"\n".join(label_lines)
+            if shape == 'record':
+                wrapped_label = f"| {wrapped_label} |"
+            width = min(max(fit_width, 0.75), width)
+            height = min(max(fit_height, global_settings["start_end_height"]), height)
+        else:
+            wrapped_label = wrap_label(label)
         node_attrs = {
             'shape': shape,
             'fontsize': str(fontsize),
@@ -110,16 +388,61 @@ def generate_flowchart(c_code):
             y_position -= 1.5
         if y_position < max_depth_y:
             max_depth_y = y_position
-        if cluster:
-            cluster.node(node_id, wrapped_label, **node_attrs)
+        return emit_node(wrapped_label, node_attrs, cluster, fontsize, lines)
+
+    # Функція для виведення блоку з готовими атрибутами (dot_line - готовий рядок DOT при відтворенні фрагмента)
+    def emit_node(wrapped_label, node_attrs, cluster, fontsize, lines, dot_line=None):
+        nonlocal node_counter
+        node_id = f"node{node_counter}"
+        shape = node_attrs['shape']
+        graph = cluster if cluster else dot
+        if dot_line is None:
+            graph.node(node_id, wrapped_label, **node_attrs)
+            dot_line = graph.body[-1]
         else:
-            dot.node(node_id, wrapped_label, **node_attrs)
+            graph.body.append(dot_line)
+        if cluster_layout is not None:
+            node_x, node_y = node_attrs['pos'].rstrip('!').split(',')
+            node_layout = {
+                "id": node_id,
+                "shape": shape,
+                "x": float(node_x),
+                "y": float(node_y),
+                "width": float(node_attrs['width']),
+                "height": float(node_attrs['height'])
+            }
+            if shape != 'point':
+                text = wrapped_label
+                if shape == 'record':
+                    text = text.strip('| ')
+                node_layout["label"] = text.split(r"\n")
+                node_layout["fontsize"] = fontsize
+            if lines:
+                node_layout["lines"] = list(lines)
+            cluster_layout["nodes"].append(node_layout)
+        emitted.append(("node", node_id, wrapped_label, node_attrs, fontsize, lines, dot_line))
         node_counter += 1
         return node_id
 
+    # Функція для додавання з'єднання до блок-схеми (tail і head у форматі "блок:порт")
+    def add_edge(cluster, tail, head, arrowhead, label=None, dot_line=None):
+        if dot_line is None:
+            cluster.edge(tail, head, label=label, fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=arrowhead)
+            dot_line = cluster.body[-1]
+        else:
+            cluster.body.append(dot_line)
+        if cluster_layout is not None:
+            tail_id, tail_port = tail.split(':')
+            head_id, head_port = head.split(':')
+            edge_layout = {"tail": tail_id, "tailport": tail_port or None, "head": head_id, "headport": head_port or None, "arrowhead": arrowhead}
+            if label:
+                edge_layout["label"] = label
+            cluster_layout["edges"].append(edge_layout)
+        emitted.append(("edge", tail, head, arrowhead, label, dot_line))
+
     # Функція для додавання спеціального блоку (для особливих форм)
-    def add_special_node(label, shape, cluster=None, fontsize=None, x=12):
-        return add_node(label, shape=shape, width=global_settings["special_shape_width"], height=global_settings["node_height"], cluster=cluster, fontsize=fontsize, x=x)
+    def add_special_node(label, shape, cluster=None, fontsize=None, x=12, lines=None):
+        return add_node(label, shape=shape, width=global_settings["special_shape_width"], height=global_settings["node_height"], cluster=cluster, fontsize=fontsize, x=x, lines=lines)
 
     # Функція для очищення мітки блоку
     def clean_label(label):
@@ -132,12 +455,19 @@ def generate_flowchart(c_code):
 
     # Функція для переносу тексту в тексті блоку
     def wrap_label(label):
-        width_factor = global_settings["width_factor"]
-        return r"\n".join(textwrap.wrap(label, width_factor))
+        return r"\n".join(textwrap.wrap(label, global_settings["width_factor"]))
+
+    # Рядки коду (розбиваються один раз)
+    code_lines = c_code.split('\n')
 
     # Функція для отримання рядка коду за координатами
     def get_code_line(node):
-        return clean_label(c_code.split('\n')[node.coord.line - 1])
+        return clean_label(code_lines[node.coord.line - 1])
+
+    # Функція для отримання діапазону рядків коду, з яких побудовано блок
+    def node_lines(*nodes):
+        line_numbers = [node.coord.line for node in nodes if node.coord]
+        return (min(line_numbers), max(line_numbers)) if line_numbers else None
 
     # Функція для форматування умовних виразів
     def format_cond(cond):
@@ -162,10 +492,10 @@ def generate_flowchart(c_code):
     def handle_for_loop(node, parent_id, cluster, edge_label=None, tailport='s', headport='n', depth=0):
         nonlocal y_position
         label = get_code_line(node)
-        for_node_id = add_special_node(label, shape='hexagon', cluster=cluster, x=12)
+        for_node_id = add_special_node(label, shape='hexagon', cluster=cluster, x=12, lines=node_lines(node))
         loop_start_y = y_position
         if parent_id:
-            cluster.edge(f"{parent_id}:{tailport}", f"{for_node_id}:{headport}", label=edge_label, fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{parent_id}:{tailport}", f"{for_node_id}:{headport}", global_settings["edge_arrows"], label=edge_label)
         
         body_id, body_tailport = traverse_ast(node.stmt, for_node_id, cluster, tailport='s', headport='n', depth=depth + 1)
 
@@ -202,28 +532,28 @@ def generate_flowchart(c_code):
             left_node_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=12, pos=f"12,{additional_node_y}!")
             additional_node_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=bend_point_right_x, pos=f"{bend_point_right_x},{additional_node_y}!")
 
-        cluster.edge(f"{body_id}:{body_tailport}", f"{bend_point_below_id}:", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{bend_point_below_id}:w", f"{bend_point_left_id}:e", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{bend_point_left_id}:n", f"{bend_point_above_id}:s", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{bend_point_above_id}:e", f"{for_node_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["loopback_arrows"])
-        cluster.edge(f"{for_node_id}:e", f"{bend_point_right_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+        add_edge(cluster, f"{body_id}:{body_tailport}", f"{bend_point_below_id}:", 'none')
+        add_edge(cluster, f"{bend_point_below_id}:w", f"{bend_point_left_id}:e", 'none')
+        add_edge(cluster, f"{bend_point_left_id}:n", f"{bend_point_above_id}:s", 'none')
+        add_edge(cluster, f"{bend_point_above_id}:e", f"{for_node_id}:w", global_settings["loopback_arrows"])
+        add_edge(cluster, f"{for_node_id}:e", f"{bend_point_right_id}:w", 'none')
 
         if depth == 0:
-            cluster.edge(f"{bend_point_right_id}:s", f"{additional_node_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-            cluster.edge(f"{additional_node_id}:w", f"{left_node_id}:e", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+            add_edge(cluster, f"{bend_point_right_id}:s", f"{additional_node_id}:n", 'none')
+            add_edge(cluster, f"{additional_node_id}:w", f"{left_node_id}:e", 'none')
             return left_node_id, 's'
         else:
-            cluster.edge(f"{bend_point_right_id}:s", f"{intermediate_node_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+            add_edge(cluster, f"{bend_point_right_id}:s", f"{intermediate_node_id}:n", 'none')
             return intermediate_node_id, 'e'
 
     # Обробка циклу while
     def handle_while_loop(node, parent_id, cluster, edge_label=None, tailport='s', headport='n', depth=0):
         nonlocal y_position
         label = get_code_line(node)
-        while_node_id = add_special_node(label, shape='diamond', cluster=cluster, x=12)
+        while_node_id = add_special_node(label, shape='diamond', cluster=cluster, x=12, lines=node_lines(node))
         loop_start_y = y_position
         if parent_id:
-            cluster.edge(f"{parent_id}:{tailport}", f"{while_node_id}:{headport}", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{parent_id}:{tailport}", f"{while_node_id}:{headport}", global_settings["edge_arrows"])
         
         body_id, body_tailport = traverse_ast(node.stmt, while_node_id, cluster, tailport='s', headport='n', depth=depth + 1)
 
@@ -260,27 +590,27 @@ def generate_flowchart(c_code):
             left_node_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=12, pos=f"12,{additional_node_y}!")
             additional_node_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=bend_point_right_x, pos=f"{bend_point_right_x},{additional_node_y}!")
 
-        cluster.edge(f"{body_id}:{body_tailport}", f"{bend_point_below_id}:", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{bend_point_below_id}:w", f"{bend_point_left_id}:e", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{bend_point_left_id}:n", f"{bend_point_above_id}:s", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{bend_point_above_id}:e", f"{while_node_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["loopback_arrows"])
-        cluster.edge(f"{while_node_id}:e", f"{bend_point_right_id}:w", label="Ні", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+        add_edge(cluster, f"{body_id}:{body_tailport}", f"{bend_point_below_id}:", 'none')
+        add_edge(cluster, f"{bend_point_below_id}:w", f"{bend_point_left_id}:e", 'none')
+        add_edge(cluster, f"{bend_point_left_id}:n", f"{bend_point_above_id}:s", 'none')
+        add_edge(cluster, f"{bend_point_above_id}:e", f"{while_node_id}:w", global_settings["loopback_arrows"])
+        add_edge(cluster, f"{while_node_id}:e", f"{bend_point_right_id}:w", 'none', label="Ні")
 
         if depth == 0:
-            cluster.edge(f"{bend_point_right_id}:s", f"{additional_node_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-            cluster.edge(f"{additional_node_id}:w", f"{left_node_id}:e", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+            add_edge(cluster, f"{bend_point_right_id}:s", f"{additional_node_id}:n", 'none')
+            add_edge(cluster, f"{additional_node_id}:w", f"{left_node_id}:e", 'none')
             return left_node_id, 's'
         else:
-            cluster.edge(f"{bend_point_right_id}:s", f"{intermediate_node_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+            add_edge(cluster, f"{bend_point_right_id}:s", f"{intermediate_node_id}:n", 'none')
             return intermediate_node_id, 'e'
 
     # Обробка оператора switch
     def handle_switch_case(node, parent_id, cluster, edge_label=None, tailport='s', headport='n', depth=0):
         nonlocal y_position, node_counter
         switch_label = get_code_line(node)
-        switch_node_id = add_node(switch_label, shape='box', cluster=cluster, x=12)
+        switch_node_id = add_node(switch_label, shape='box', cluster=cluster, x=12, lines=node_lines(node))
         if parent_id:
-            cluster.edge(f"{parent_id}:{tailport}", f"{switch_node_id}:{headport}", label=edge_label, fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{parent_id}:{tailport}", f"{switch_node_id}:{headport}", global_settings["edge_arrows"], label=edge_label)
 
         num_cases = len(node.stmt.block_items)
         base_x = 12 - ((num_cases - 1) * global_settings["branch_spacing"]) / 2
@@ -293,16 +623,16 @@ def generate_flowchart(c_code):
         for i, case in enumerate(node.stmt.block_items):
             if isinstance(case, c_ast.Case):
                 case_label = f"case {format_cond(case.expr)}:"
-                case_node_id = add_node(case_label, shape='diamond', cluster=cluster, x=case_x_positions[i], pos=f"{case_x_positions[i]},{case_y_position}!")
+                case_node_id = add_node(case_label, shape='diamond', cluster=cluster, x=case_x_positions[i], pos=f"{case_x_positions[i]},{case_y_position}!", lines=node_lines(case))
                 if previous_case_id is None:
                     switch_case_y = case_y_position + 0.75
                     switch_point_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=12, pos=f"12,{switch_case_y}!")
                     case_point_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=case_x_positions[i], pos=f"{case_x_positions[i]},{switch_case_y}!")
-                    cluster.edge(f"{switch_node_id}:s", f"{switch_point_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-                    cluster.edge(f"{switch_point_id}:e", f"{case_point_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-                    cluster.edge(f"{case_point_id}:s", f"{case_node_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                    add_edge(cluster, f"{switch_node_id}:s", f"{switch_point_id}:n", 'none')
+                    add_edge(cluster, f"{switch_point_id}:e", f"{case_point_id}:w", 'none')
+                    add_edge(cluster, f"{case_point_id}:s", f"{case_node_id}:n", global_settings["edge_arrows"])
                 else:
-                    cluster.edge(f"{previous_case_id}:e", f"{case_node_id}:w", label="Ні", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                    add_edge(cluster, f"{previous_case_id}:e", f"{case_node_id}:w", global_settings["edge_arrows"], label="Ні")
                 previous_case_id = case_node_id
 
                 content_y_position = case_y_position - 1.5
@@ -317,16 +647,16 @@ def generate_flowchart(c_code):
                 case_concentrators.append((case_node_id, last_stmt_id))
             elif isinstance(case, c_ast.Default):
                 default_label = "default:"
-                default_node_id = add_node(default_label, shape='diamond', cluster=cluster, x=case_x_positions[i], pos=f"{case_x_positions[i]},{case_y_position}!")
+                default_node_id = add_node(default_label, shape='diamond', cluster=cluster, x=case_x_positions[i], pos=f"{case_x_positions[i]},{case_y_position}!", lines=node_lines(case))
                 if previous_case_id is None:
                     switch_case_y = case_y_position + 0.75
                     switch_point_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=12, pos=f"12,{switch_case_y}!")
                     case_point_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=case_x_positions[i], pos=f"{case_x_positions[i]},{switch_case_y}!")
-                    cluster.edge(f"{switch_node_id}:s", f"{switch_point_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-                    cluster.edge(f"{switch_point_id}:e", f"{case_point_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-                    cluster.edge(f"{case_point_id}:s", f"{default_node_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                    add_edge(cluster, f"{switch_node_id}:s", f"{switch_point_id}:n", 'none')
+                    add_edge(cluster, f"{switch_point_id}:e", f"{case_point_id}:w", 'none')
+                    add_edge(cluster, f"{case_point_id}:s", f"{default_node_id}:n", global_settings["edge_arrows"])
                 else:
-                    cluster.edge(f"{previous_case_id}:e", f"{default_node_id}:w", label="Ні", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                    add_edge(cluster, f"{previous_case_id}:e", f"{default_node_id}:w", global_settings["edge_arrows"], label="Ні")
                 previous_case_id = default_node_id
 
                 content_y_position = case_y_position - 1.5
@@ -347,14 +677,14 @@ def generate_flowchart(c_code):
         for case_node_id, last_stmt_id in case_concentrators:
             concentrator_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=case_x_positions[case_concentrators.index((case_node_id, last_stmt_id))], pos=f"{case_x_positions[case_concentrators.index((case_node_id, last_stmt_id))]},{y_concentrator}!")
             concentrator_ids.append(concentrator_id)
-            cluster.edge(f"{last_stmt_id}:{tailport}", f"{concentrator_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{last_stmt_id}:{tailport}", f"{concentrator_id}:n", global_settings["edge_arrows"])
 
         if len(concentrator_ids) > 1:
-            cluster.edge(f"{concentrator_ids[0]}:e", f"{concentrator_ids[-1]}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+            add_edge(cluster, f"{concentrator_ids[0]}:e", f"{concentrator_ids[-1]}:w", 'none')
 
         additional_concentrator_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=12, pos=f"12,{y_concentrator}!")
         if len(concentrator_ids) > 0:
-            cluster.edge(f"{concentrator_ids[-1]}:e", f"{additional_concentrator_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+            add_edge(cluster, f"{concentrator_ids[-1]}:e", f"{additional_concentrator_id}:w", 'none')
 
         return additional_concentrator_id, 's'
 
@@ -362,9 +692,9 @@ def generate_flowchart(c_code):
     def handle_single_branch_if(node, parent_id, cluster, edge_label=None, tailport='s', headport='n', depth=0, x=12):
         nonlocal y_position
         label = f"if {format_cond(node.cond)}"
-        if_node_id = add_special_node(label, shape='diamond', cluster=cluster, x=x)
+        if_node_id = add_special_node(label, shape='diamond', cluster=cluster, x=x, lines=node_lines(node))
         if parent_id:
-            cluster.edge(f"{parent_id}:{tailport}", f"{if_node_id}:{headport}", label=edge_label, fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{parent_id}:{tailport}", f"{if_node_id}:{headport}", global_settings["edge_arrows"], label=edge_label)
 
         true_branch_x = x
         current_y = y_position
@@ -385,9 +715,9 @@ def generate_flowchart(c_code):
 
         last_true_point_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=x, pos=f"{x},{current_y - 0.75}!")
 
-        cluster.edge(f"{if_node_id}:e",f"{true_bend_point1_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{true_bend_point1_id}:s", f"{true_bend_point2_id}:n", label="Ні", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{true_bend_point2_id}:e", f"{last_true_point_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+        add_edge(cluster, f"{if_node_id}:e", f"{true_bend_point1_id}:w", 'none')
+        add_edge(cluster, f"{true_bend_point1_id}:s", f"{true_bend_point2_id}:n", 'none', label="Ні")
+        add_edge(cluster, f"{true_bend_point2_id}:e", f"{last_true_point_id}:w", global_settings["edge_arrows"])
 
         return true_branch_id, 's'
 
@@ -395,9 +725,9 @@ def generate_flowchart(c_code):
     def handle_if_else(node, parent_id, cluster, edge_label=None, tailport='s', headport='n', depth=0, x=12):
         nonlocal y_position
         label = f"if {format_cond(node.cond)}"
-        if_node_id = add_special_node(label, shape='diamond', cluster=cluster, x=x)
+        if_node_id = add_special_node(label, shape='diamond', cluster=cluster, x=x, lines=node_lines(node))
         if parent_id:
-            cluster.edge(f"{parent_id}:{tailport}", f"{if_node_id}:{headport}", label=edge_label, fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{parent_id}:{tailport}", f"{if_node_id}:{headport}", global_settings["edge_arrows"], label=edge_label)
 
         branch_spacing = global_settings["branch_spacing"] / (depth + 1)
         true_branch_x = x - branch_spacing
@@ -407,8 +737,8 @@ def generate_flowchart(c_code):
         true_bend_point_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=true_branch_x, pos=f"{true_branch_x},{current_y + 1.5}!")
         false_bend_point_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=false_branch_x, pos=f"{false_branch_x},{current_y + 1.5}!")
 
-        cluster.edge(f"{if_node_id}:w", f"{true_bend_point_id}:e", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{if_node_id}:e", f"{false_bend_point_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+        add_edge(cluster, f"{if_node_id}:w", f"{true_bend_point_id}:e", 'none')
+        add_edge(cluster, f"{if_node_id}:e", f"{false_bend_point_id}:w", 'none')
 
         y_position = current_y
         true_branch_id, true_tailport = traverse_ast(node.iftrue, true_bend_point_id, cluster, edge_label="Так", tailport='s', headport='n', depth=depth + 1, x=true_branch_x)
@@ -422,31 +752,115 @@ def generate_flowchart(c_code):
 
         if not isinstance(node.iftrue, c_ast.If):
             true_concentrator_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=true_branch_x, pos=f"{true_branch_x},{concentrator_y}!")
-            cluster.edge(f"{true_branch_id}:{true_tailport}", f"{true_concentrator_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{true_branch_id}:{true_tailport}", f"{true_concentrator_id}:n", global_settings["edge_arrows"])
         else:
             true_concentrator_id = true_branch_id
 
         if not isinstance(node.iffalse, c_ast.If):
             false_concentrator_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=false_branch_x, pos=f"{false_branch_x},{concentrator_y}!")
-            cluster.edge(f"{false_branch_id}:{false_tailport}", f"{false_concentrator_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+            add_edge(cluster, f"{false_branch_id}:{false_tailport}", f"{false_concentrator_id}:n", global_settings["edge_arrows"])
         else:
             false_concentrator_id = false_branch_id
 
         if true_concentrator_id and false_concentrator_id:
-            cluster.edge(f"{true_concentrator_id}:e", f"{false_concentrator_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+            add_edge(cluster, f"{true_concentrator_id}:e", f"{false_concentrator_id}:w", 'none')
 
         additional_concentrator_id = add_node("", shape='point', width=0.1, height=0.1, cluster=cluster, x=12, pos=f"12,{concentrator_y}!")
-        cluster.edge(f"{true_concentrator_id}:e", f"{additional_concentrator_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
-        cluster.edge(f"{false_concentrator_id}:w", f"{additional_concentrator_id}:w", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead='none')
+        add_edge(cluster, f"{true_concentrator_id}:e", f"{additional_concentrator_id}:w", 'none')
+        add_edge(cluster, f"{false_concentrator_id}:w", f"{additional_concentrator_id}:w", 'none')
 
         return additional_concentrator_id, 's'
 
     # Функція для проходження AST (Abstract Syntax Tree) та генерації блок-схеми
     def traverse_ast(node, parent_id=None, cluster=None, edge_label=None, tailport='s', headport='n', depth=0, x=12, y_pos=None):
-        nonlocal node_counter, y_position, max_depth_y
+        nonlocal y_position, max_depth_y
         if y_pos is not None:
             y_position = y_pos
 
+        # Структурно однакові піддерева (з тими ж глибиною, положенням та з'єднанням з батьківським блоком)
+        # будуються один раз, далі записаний фрагмент відтворюється з відносними координатами
+        if isinstance(node, memo_types) and node.coord:
+            memo_key = (subtree_key(node), depth, x, edge_label, tailport, headport, parent_id is None)
+            fragment = fragments.get(memo_key)
+            if fragment is not None:
+                return replay_fragment(fragment, node, parent_id, cluster)
+            start_index = len(emitted)
+            start_y = y_position
+            outer_max_depth_y = max_depth_y
+            max_depth_y = float('inf')
+            result = traverse_node(node, parent_id, cluster, edge_label, tailport, headport, depth, x)
+            fragments[memo_key] = {
+                "ops": emitted[start_index:],
+                "line": node.coord.line,
+                "parent_id": parent_id,
+                "start_y": start_y,
+                "end_y": y_position,
+                "min_y": max_depth_y,
+                "result": result
+            }
+            max_depth_y = min(outer_max_depth_y, max_depth_y)
+            return result
+        return traverse_node(node, parent_id, cluster, edge_label, tailport, headport, depth, x)
+
+    # Типи вузлів, фрагменти яких запам'ятовуються
+    memo_types = (c_ast.Compound, c_ast.If, c_ast.For, c_ast.While, c_ast.Switch)
+
+    # Структурний ключ піддерева: тип, атрибути та текст рядка кожного вузла,
+    # номери рядків дочірніх вузлів відносно батьківського
+    def subtree_key(node):
+        key = subtree_keys.get(id(node))
+        if key is None:
+            parts = [type(node).__name__, tuple(getattr(node, name) for name in node.attr_names)]
+            if node.coord:
+                parts.append(code_lines[node.coord.line - 1])
+            for child_name, child in node.children():
+                line_offset = child.coord.line - node.coord.line if child.coord and node.coord else None
+                parts.append((child_name, line_offset, subtree_key(child)))
+            key = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).digest()
+            subtree_keys[id(node)] = key
+        return key
+
+    # Відтворення записаного фрагмента: нові ідентифікатори блоків, зсув координат і номерів рядків.
+    # Записані рядки DOT змінюються текстово, тому атрибути повторно не форматуються
+    def replay_fragment(fragment, node, parent_id, cluster):
+        nonlocal y_position, max_depth_y
+        y_offset = y_position - fragment["start_y"]
+        line_offset = node.coord.line - fragment["line"]
+        id_map = {fragment["parent_id"]: parent_id}
+
+        def remap(endpoint):
+            node_ref, port = endpoint.split(':')
+            return f"{id_map[node_ref]}:{port}"
+
+        def dot_endpoint(endpoint):
+            node_ref, port = endpoint.split(':')
+            return f"{node_ref}:{port}" if port else node_ref
+
+        for op in fragment["ops"]:
+            if op[0] == "node":
+                kind, old_id, wrapped_label, node_attrs, fontsize, lines, dot_line = op
+                node_x, node_y = node_attrs['pos'].rstrip('!').split(',')
+                new_pos = f"{node_x},{float(node_y) + y_offset}!"
+                new_attrs = dict(node_attrs, pos=new_pos)
+                new_lines = (lines[0] + line_offset, lines[1] + line_offset) if lines else None
+                dot_line = dot_line.replace(f"{old_id} [", f"node{node_counter} [", 1)
+                before_pos, after_pos = dot_line.rsplit(f'pos="{node_attrs["pos"]}"', 1)
+                dot_line = f'{before_pos}pos="{new_pos}"{after_pos}'
+                id_map[old_id] = emit_node(wrapped_label, new_attrs, cluster, fontsize, new_lines, dot_line)
+            else:
+                kind, tail, head, arrowhead, label, dot_line = op
+                tail, head = remap(tail), remap(head)
+                indent = dot_line[:len(dot_line) - len(dot_line.lstrip())]
+                dot_line = f"{indent}{dot_endpoint(tail)} -> {dot_endpoint(head)}{dot_line[dot_line.index(' ['):]}"
+                add_edge(cluster, tail, head, arrowhead, label, dot_line)
+        y_position = fragment["end_y"] + y_offset
+        if fragment["min_y"] != float('inf'):
+            max_depth_y = min(max_depth_y, fragment["min_y"] + y_offset)
+        result_id, result_port = fragment["result"]
+        return id_map.get(result_id, result_id), result_port
+
+    # Побудова блок-схеми для вузла AST
+    def traverse_node(node, parent_id, cluster, edge_label, tailport, headport, depth, x):
         decl_nodes = []
 
         if isinstance(node, c_ast.Compound):
@@ -458,18 +872,18 @@ def generate_flowchart(c_code):
                         continue  # Ignore break statements
                     if decl_nodes:
                         combined_label = ", ".join(get_code_line(decl) for decl in decl_nodes)
-                        node_id = add_node(combined_label, cluster=cluster, x=x)
+                        node_id = add_node(combined_label, cluster=cluster, x=x, lines=node_lines(*decl_nodes))
                         if parent_id:
-                            cluster.edge(f"{parent_id}:{tailport}", f"{node_id}:{headport}", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                            add_edge(cluster, f"{parent_id}:{tailport}", f"{node_id}:{headport}", global_settings["edge_arrows"])
                         parent_id = node_id
                         tailport = 's'
                         decl_nodes.clear()
                     parent_id, tailport = traverse_ast(stmt, parent_id, cluster, edge_label, tailport, headport, depth, x)
             if decl_nodes:
                 combined_label = ", ".join(get_code_line(decl) for decl in decl_nodes)
-                node_id = add_node(combined_label, cluster=cluster, x=x)
+                node_id = add_node(combined_label, cluster=cluster, x=x, lines=node_lines(*decl_nodes))
                 if parent_id:
-                    cluster.edge(f"{parent_id}:{tailport}", f"{node_id}:{headport}", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                    add_edge(cluster, f"{parent_id}:{tailport}", f"{node_id}:{headport}", global_settings["edge_arrows"])
                 parent_id = node_id
                 tailport = 's'
             return parent_id, tailport
@@ -483,9 +897,9 @@ def generate_flowchart(c_code):
                 label = f"| {wrap_label(label)} |"  # Перенос тексту для користувацьких функцій
                 shape = 'record'
                 width = global_settings["special_shape_width"]
-            node_id = add_node(label, shape=shape, width=width, cluster=cluster, x=x)
+            node_id = add_node(label, shape=shape, width=width, cluster=cluster, x=x, lines=node_lines(node))
             if parent_id:
-                cluster.edge(f"{parent_id}:{tailport}", f"{node_id}:{headport}", label=edge_label, fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                add_edge(cluster, f"{parent_id}:{tailport}", f"{node_id}:{headport}", global_settings["edge_arrows"], label=edge_label)
             return node_id, 's'
         elif isinstance(node, c_ast.FuncCall):
             func_name = node.name.name
@@ -504,9 +918,9 @@ def generate_flowchart(c_code):
                 label = f"| {wrap_label(label)} |"  # Перенос тексту для користувацьких функцій
                 shape = 'record'
                 width = global_settings["special_shape_width"]
-            node_id = add_node(label, shape=shape, width=width, cluster=cluster, x=x)
+            node_id = add_node(label, shape=shape, width=width, cluster=cluster, x=x, lines=node_lines(node))
             if parent_id:
-                cluster.edge(f"{parent_id}:{tailport}", f"{node_id}:{headport}", label=edge_label, fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
+                add_edge(cluster, f"{parent_id}:{tailport}", f"{node_id}:{headport}", global_settings["edge_arrows"], label=edge_label)
             return node_id, 's'
         elif isinstance(node, c_ast.If):
             false_branch = node.iffalse
@@ -528,22 +942,67 @@ def generate_flowchart(c_code):
 
     cluster_ids = []
 
-    # Генерація блок-схем для кожної функції
-    for ext in ast.ext:
-        if isinstance(ext, c_ast.FuncDef):
-            func_decl = get_code_line(ext.decl)
-            func_decl = preserve_spaces(func_decl)
-            with dot.subgraph(name=f'cluster_{ext.decl.name}') as cluster:
-                cluster.attr(label=f"< <B>Блок-схема для функції {func_decl}</B> >", labelloc="t", fontsize=str(global_settings["cluster_fontsize"]), margin=str(global_settings["cluster_margin"]))
-                cluster.attr(overlap='true')
-                start_id = add_node('Початок', shape='Mrecord', height=global_settings["start_end_height"], cluster=cluster, pos=f"12,{y_position}!")
-                y_position -= 1.5
-                max_depth_y = y_position
-                parent_id, tailport = traverse_ast(ext.body, start_id, cluster, depth=0, x=12)
-                end_id = add_node('Кінець', shape='Mrecord', height=global_settings["start_end_height"], cluster=cluster, pos=f"12,{max_depth_y}!")
-                y_position = max_depth_y
-                cluster.edge(f"{parent_id}:{tailport}", f"{end_id}:n", fontsize=str(global_settings["edge_fontsize"]), penwidth=str(global_settings["edge_penwidth"]), arrowhead=global_settings["edge_arrows"])
-            cluster_ids.append(f'cluster_{ext.decl.name}')
+    # Потоковий експорт розміщення у JSON: функції записуються по мірі генерації.
+    # Файл за шляхом спочатку пишеться у тимчасовий і замінює попередній лише після успішної генерації
+    layout_stream = None
+    if layout_file is not None:
+        if isinstance(layout_file, str):
+            layout_stream = open(f"{layout_file}.tmp", 'w', encoding='utf-8')
+        else:
+            layout_stream = layout_file
+        layout_stream.write('{"units":"inch","style":' + json.dumps({
+            "edge_fontsize": global_settings["edge_fontsize"],
+            "edge_penwidth": global_settings["edge_penwidth"],
+            "node_penwidth": global_settings["node_penwidth"]
+        }, separators=(',', ':')) + ',"clusters":[')
+
+    try:
+        # Рядки початку елементів верхнього рівня (для визначення діапазону рядків функцій)
+        ext_lines = sorted(ext.coord.line for ext in ast.ext if ext.coord) + [len(code_lines) + 1]
+
+        # Генерація блок-схем для кожної функції
+        for ext in ast.ext:
+            if isinstance(ext, c_ast.FuncDef):
+                if functions is not None and ext.decl.name not in functions:
+                    continue
+                emitted.clear()
+                func_decl = get_code_line(ext.decl)
+                func_end = min(line for line in ext_lines if line > ext.coord.line) - 1
+                # Порожні рядки (і рядки лише з коментарями) після функції не входять у її діапазон
+                while func_end > ext.coord.line and not code_lines[func_end - 1].strip():
+                    func_end -= 1
+                func_lines = (ext.coord.line, func_end)
+                if layout_stream is not None:
+                    cluster_layout = {"id": f'cluster_{ext.decl.name}', "function": ext.decl.name, "label": f"Блок-схема для функції {func_decl}", "lines": list(func_lines), "nodes": [], "edges": []}
+                func_decl = preserve_spaces(func_decl)
+                with dot.subgraph(name=f'cluster_{ext.decl.name}') as cluster:
+                    cluster.attr(label=f"< <B>Блок-схема для функції {func_decl}</B> >", labelloc="t", fontsize=str(global_settings["cluster_fontsize"]), margin=str(global_settings["cluster_margin"]))
+                    cluster.attr(overlap='true')
+                    start_id = add_node('Початок', shape='Mrecord', height=global_settings["start_end_height"], cluster=cluster, pos=f"12,{y_position}!", lines=(func_lines[0], func_lines[0]))
+                    y_position -= 1.5
+                    max_depth_y = y_position
+                    parent_id, tailport = traverse_ast(ext.body, start_id, cluster, depth=0, x=12)
+                    end_id = add_node('Кінець', shape='Mrecord', height=global_settings["start_end_height"], cluster=cluster, pos=f"12,{max_depth_y}!", lines=(func_lines[1], func_lines[1]))
+                    y_position = max_depth_y
+                    add_edge(cluster, f"{parent_id}:{tailport}", f"{end_id}:n", global_settings["edge_arrows"])
+                if layout_stream is not None:
+                    if cluster_ids:
+                        layout_stream.write(',')
+                    layout_stream.write(json.dumps(cluster_layout, ensure_ascii=False, separators=(',', ':')))
+                    cluster_layout = None
+                cluster_ids.append(f'cluster_{ext.decl.name}')
+
+        if layout_stream is not None:
+            layout_stream.write(']}')
+    except BaseException:
+        # Незавершений файл розміщення не залишається на диску
+        if layout_stream is not None and layout_stream is not layout_file:
+            layout_stream.close()
+            os.remove(f"{layout_file}.tmp")
+        raise
+    if layout_stream is not None and layout_stream is not layout_file:
+        layout_stream.close()
+        os.replace(f"{layout_file}.tmp", layout_file)
 
     # З'єднання кластерів невидимими з'єднаннями, для запобігання розкидання по полотну
     for i in range(len(cluster_ids) - 1):
@@ -551,11 +1010,16 @@ def generate_flowchart(c_code):
 
     dot_output = dot.source
 
-    dot_file_path = os.path.join(temp_dir, 'flowchart.dot')
+    # Без рендерингу (клієнт сам малює блок-схему за розміщенням з JSON)
+    if not render:
+        return dot_output, layout_file if isinstance(layout_file, str) else None
+
+    dot_file_path = f"{output_path}.dot"
     with open(dot_file_path, 'w') as dot_file:
         dot_file.write(dot_output)
 
     if global_settings["online_mode"]:
+        import requests
         url = "https://kroki.io/graphviz/svg"
         headers = {
             "Content-Type": "text/plain"
@@ -564,23 +1028,58 @@ def generate_flowchart(c_code):
 
         if response.status_code == 200:
             svg_output = response.content
-            svg_file_path = os.path.join(temp_dir, 'flowchart.svg')
+            svg_file_path = f"{output_path}.svg"
             with open(svg_file_path, 'wb') as svg_file:
                 svg_file.write(svg_output)
-            return dot_output, svg_file_path
         else:
             raise Exception(f"Error generating flowchart: {response.status_code} {response.text}")
     else:
-        dot_path = os.path.join(temp_dir, 'flowchart')
-        dot.render(dot_path, format='svg')
-        return dot_output, f"{dot_path}.svg"
+        dot.render(output_path, format='svg')
+        svg_file_path = f"{output_path}.svg"
+
+    if global_settings["minify_svg"]:
+        from svg_minify import minify_svg
+        minify_result = minify_svg(svg_file_path)
+        if stats is not None:
+            stats["minify_svg"] = minify_result
+    return dot_output, svg_file_path
+
+# Потокова генерація блок-схем для великого файлу: файл відображається у пам'ять,
+# розбивається на функції верхнього рівня, і кожна функція розбирається та
+# генерується окремо, тому пікове використання пам'яті визначається найбільшою функцією.
+# Повертає список шляхів до SVG-файлів (по одному на функцію)
+def generate_flowcharts_from_file(file_path, output_dir=None, function_index=None):
+    import mmap
+    import os
+
+    output_dir = output_dir or os.path.join(os.getcwd(), 'temp', os.path.splitext(os.path.basename(file_path))[0])
+    svg_paths = []
+    with open(file_path, 'rb') as source_file:
+        if os.fstat(source_file.fileno()).st_size == 0:
+            return svg_paths
+        with mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            # Перший прохід: імена функцій файлу (без копіювання їх тіл)
+            function_names = set(function_index or ())
+            function_names.update(name for kind, name, start, end in split_top_level(buffer) if kind == "function" and name)
+
+            # Другий прохід: визначення типів накопичуються, функції генеруються по одній
+            for name, c_code in function_sources(buffer):
+                dot_output, svg_path = generate_flowchart(c_code, function_index=function_names, functions={name}, output_path=os.path.join(output_dir, name))
+                svg_paths.append(svg_path)
+    return svg_paths
 
 # Основна функція для запуску генерації блок-схеми
 def main():
+    import sys
     new_settings = {
         "online_mode": False
     }
     update_global_settings(new_settings)
+    # Великий файл, переданий у командному рядку, обробляється потоково, по функціях
+    if len(sys.argv) > 1:
+        for svg_path in generate_flowcharts_from_file(sys.argv[1]):
+            print(f"Flowchart SVG file saved at: {svg_path}")
+        return
     #нижче можна ввести код С, для побудови блок-схеми без інтерфейсу
     example_c_code = """
     
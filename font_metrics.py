@@ -0,0 +1,132 @@
+# Метрики шрифтів для автоматичного розміру блоків: ширина тексту визначається
+# за таблицею ширин символів (у тисячних частках кегля), результати вимірювань кешуються
+from functools import lru_cache
+
+# Шрифт Graphviz за замовчуванням
+DEFAULT_FONT = "Times-Roman"
+
+# Ширини символів Times-Roman (Adobe AFM); кирилиця - за Times New Roman (наближено)
+TIMES_ROMAN_WIDTHS = {
+    " ": 250, "!": 333, "\"": 408, "#": 500, "$": 500, "%": 833, "&": 778, "'": 333,
+    "(": 333, ")": 333, "*": 500, "+": 564, ",": 250, "-": 333, ".": 250, "/": 278,
+    "0": 500, "1": 500, "2": 500, "3": 500, "4": 500, "5": 500, "6": 500, "7": 500,
+    "8": 500, "9": 500, ":": 278, ";": 278, "<": 564, "=": 564, ">": 564, "?": 444,
+    "@": 921, "A": 722, "B": 667, "C": 667, "D": 722, "E": 611, "F": 556, "G": 722,
+    "H": 722, "I": 333, "J": 389, "K": 722, "L": 611, "M": 889, "N": 722, "O": 722,
+    "P": 556, "Q": 722, "R": 667, "S": 556, "T": 611, "U": 722, "V": 722, "W": 944,
+    "X": 722, "Y": 722, "Z": 611, "[": 333, "\\": 278, "]": 333, "^": 469, "_": 500,
+    "`": 333, "a": 444, "b": 500, "c": 444, "d": 500, "e": 444, "f": 333, "g": 500,
+    "h": 500, "i": 278, "j": 278, "k": 500, "l": 278, "m": 778, "n": 500, "o": 500,
+    "p": 500, "q": 500, "r": 333, "s": 389, "t": 278, "u": 500, "v": 500, "w": 722,
+    "x": 500, "y": 500, "z": 444, "{": 480, "|": 200, "}": 480, "~": 541,
+    "А": 722, "Б": 574, "В": 667, "Г": 578, "Ґ": 578, "Д": 682, "Е": 611, "Є": 667,
+    "Ж": 896, "З": 501, "И": 722, "І": 333, "Ї": 333, "Й": 722, "К": 667, "Л": 678,
+    "М": 889, "Н": 722, "О": 722, "П": 722, "Р": 556, "С": 667, "Т": 611, "У": 708,
+    "Ф": 790, "Х": 722, "Ц": 722, "Ч": 650, "Ш": 1009, "Щ": 1009, "Ь": 574, "Ю": 1028,
+    "Я": 667, "а": 444, "б": 509, "в": 472, "г": 410, "ґ": 410, "д": 509, "е": 444,
+    "є": 444, "ж": 691, "з": 395, "и": 535, "і": 278, "ї": 278, "й": 535, "к": 486,
+    "л": 499, "м": 633, "н": 535, "о": 500, "п": 535, "р": 500, "с": 444, "т": 437,
+    "у": 500, "ф": 648, "х": 500, "ц": 535, "ч": 503, "ш": 770, "щ": 770, "ь": 456,
+    "ю": 747, "я": 479, "’": 333, "«": 500, "»": 500, "–": 500, "—": 1000
+}
+
+# Таблиці ширин символів за назвою шрифту
+FONT_TABLES = {DEFAULT_FONT: TIMES_ROMAN_WIDTHS}
+
+# Ширина невідомих символів
+DEFAULT_ADVANCE = 556
+
+# Коефіцієнт міжрядкового інтервалу Graphviz
+LINE_HEIGHT = 1.2
+
+# Найменший кегль, до якого зменшується текст, що не вміщується в блок
+MIN_FONTSIZE = 8
+
+# Додавання таблиці ширин символів, виміряних за файлом шрифту (потрібен Pillow)
+def register_font_file(fontname, font_path, characters=None):
+    from PIL import ImageFont
+    font = ImageFont.truetype(font_path, 1000)
+    characters = characters or "".join(TIMES_ROMAN_WIDTHS)
+    FONT_TABLES[fontname] = {char: round(font.getlength(char)) for char in characters}
+    text_width.cache_clear()
+    wrap_text.cache_clear()
+
+# Ширина рядка тексту в пунктах
+@lru_cache(maxsize=8192)
+def text_width(text, fontsize, fontname=DEFAULT_FONT):
+    widths = FONT_TABLES.get(fontname, TIMES_ROMAN_WIDTHS)
+    return sum(widths.get(char, DEFAULT_ADVANCE) for char in text) * fontsize / 1000
+
+# Перенесення тексту за шириною в пунктах (слова, довші за рядок, розбиваються)
+@lru_cache(maxsize=4096)
+def wrap_text(text, max_width, fontsize, fontname=DEFAULT_FONT):
+    space_width = text_width(" ", fontsize, fontname)
+    lines = []
+    line = ""
+    line_width = 0
+    for word in text.split():
+        word_width = text_width(word, fontsize, fontname)
+        if line and line_width + space_width + word_width <= max_width:
+            line += " " + word
+            line_width += space_width + word_width
+            continue
+        if line:
+            lines.append(line)
+        # Розбиття занадто довгого слова посимвольно
+        while word_width > max_width and len(word) > 1:
+            cut = 1
+            while cut < len(word) and text_width(word[:cut + 1], fontsize, fontname) <= max_width:
+                cut += 1
+            lines.append(word[:cut])
+            word = word[cut:]
+            word_width = text_width(word, fontsize, fontname)
+        line = word
+        line_width = word_width
+    if line:
+        lines.append(line)
+    return tuple(lines)
+
+# Розмір блоку (ширина, висота) в дюймах, достатній для рядків тексту з урахуванням форми
+def fit_node_size(lines, fontsize, shape, fontname=DEFAULT_FONT):
+    text_w = max((text_width(line, fontsize, fontname) for line in lines), default=0) / 72
+    text_h = max(len(lines), 1) * fontsize * LINE_HEIGHT / 72
+    if shape == 'diamond':
+        # Текстовий прямокутник вписується в ромб удвічі більших розмірів
+        width, height = text_w * 2, text_h * 2
+    elif shape == 'hexagon':
+        width, height = text_w + text_h, text_h
+    elif shape == 'parallelogram':
+        width, height = text_w + text_h * 1.2, text_h
+    elif shape == 'record':
+        # Бічні поля позначення підпрограми
+        width, height = text_w + 0.3, text_h
+    else:
+        width, height = text_w, text_h
+    # Внутрішні відступи Graphviz (margin=0.11,0.055)
+    return round(width + 0.22, 2), round(height + 0.11, 2)
+
+# Ширина (в пунктах), доступна для тексту в блоці заданої ширини в дюймах (обернено до fit_node_size)
+def text_area_width(width, shape, fontsize, line_count=1):
+    text_h = line_count * fontsize * LINE_HEIGHT / 72
+    width -= 0.22
+    if shape == 'diamond':
+        width /= 2
+    elif shape == 'hexagon':
+        width -= text_h
+    elif shape == 'parallelogram':
+        width -= text_h * 1.2
+    elif shape == 'record':
+        width -= 0.3
+    return max(width, 0) * 72
+
+# Розміщення тексту в блоці, не більшому за max_width x max_height (дюйми): текст переноситься
+# за виміряною шириною, блок зменшується до розміру тексту, а якщо текст не вміщується
+# у найбільший блок, зменшується кегль (не менше min_fontsize). Повертає (рядки, кегль, ширина, висота)
+def fit_label(text, max_width, max_height, fontsize, shape, fontname=DEFAULT_FONT, min_fontsize=MIN_FONTSIZE):
+    size = fontsize
+    while True:
+        lines = wrap_text(text, text_area_width(max_width, shape, size), size, fontname)
+        width, height = fit_node_size(lines, size, shape, fontname)
+        if (width <= max_width and height <= max_height) or size <= min_fontsize:
+            return lines, size, min(width, max_width), min(height, max_height)
+        size = max(size - 1, min_fontsize)
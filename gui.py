@@ -1,14 +1,18 @@
+import time
+startup_time = time.perf_counter()  # Час початку запуску (для вимірювання холодного старту)
+
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from tkinter.scrolledtext import ScrolledText
-from PIL import Image, ImageTk
-from pygments import lex
-from pygments.lexers import CLexer
-from pygments.styles import get_style_by_name
-from flowchart_generator import generate_flowchart, update_global_settings, global_settings
+from flowchart_generator import generate_flowchart, update_global_settings, global_settings, check_functions, function_at, function_source, split_top_level
+from scheduler import GenerationScheduler
 import os
+import queue
 import shutil
-import cairosvg
+import threading
+
+# Бібліотеки рендерингу (PIL, cairosvg, pygments) імпортуються при першому використанні,
+# щоб вікно з'являлось якомога швидше; фоновий потік завантажує їх заздалегідь
 
 class FlowchartApp:
     def __init__(self, root):
@@ -18,10 +22,39 @@ class FlowchartApp:
         self.create_menu()
         self.scale_factor = 1.0  # Коефіцієнт масштабування
         self.image = None  # Зберігання оригінального зображення
-        self.style = get_style_by_name("default")  # Використання стандартного стилю
-        self.setup_tags()
+        self.image_source = None  # Файл, з якого растеризовано зображення (повна блок-схема або перегляд функції)
+        self.chart_path = None  # SVG показаної блок-схеми (усього коду або функції в режимі фокусування)
+        self.style = None  # Стиль підсвічування завантажується при першому підсвічуванні
         self.auto_update = True  # Автоматичне оновлення блок-схеми
         self.update_id = None  # ID запланованого оновлення
+        self.last_generated = None  # Коректний код і налаштування останньої побудованої блок-схеми
+        self.last_good_functions = {}  # Останні коректні версії функцій (підставляються замість функцій з помилками)
+        self.scheduler = GenerationScheduler()  # Адаптивна затримка за тривалістю попередніх генерацій
+        self.generation_thread = None  # Фоновий потік генерації (None - генерація не виконується)
+        self.pending_generation = False  # Код змінився під час генерації
+        self.generation_results = queue.Queue()  # Результати фонової генерації для головного потоку
+        self.focused_mode = False  # Побудова лише функції під курсором або вибраної у списку
+        self.focused_function = None  # Функція, показана в режимі фокусування
+        self.focused_cache = {}  # Ім'я функції -> (ключ генерації, зображення, шлях до SVG)
+        self.focused_scheduler = GenerationScheduler()  # Тривалості побудови окремих функцій (за розміром коду функції)
+        self.focused_size = 0  # Розмір коду останньої побудованої функції в режимі фокусування
+        self.export_thread = None  # Фоновий потік пакетного експорту (None - експорт не виконується)
+        self.export_results = queue.Queue()  # Результат пакетного експорту для головного потоку
+
+    # Фонове завантаження бібліотек рендерингу, парсера та Graphviz
+    def start_warm_up(self):
+        threading.Thread(target=self.warm_up, daemon=True).start()
+
+    def warm_up(self):
+        import flowchart_generator
+        try:
+            from PIL import Image, ImageTk
+            import pygments.lexers
+            import pygments.styles
+            import cairosvg
+            flowchart_generator.warm_up()
+        except Exception:
+            pass  # Помилка буде показана при першому використанні
 
     # Створення віджетів
     def create_widgets(self):
@@ -46,6 +79,9 @@ class FlowchartApp:
         self.create_checkbox("Стрілки на лініях", "edge_arrows", 17, "normal", "none",initial=True)
         self.create_checkbox("Стрілки циклу", "loopback_arrows", 18, "normal", "none",initial=True)
         self.create_checkbox("Авто-оновлення", "auto_update", 19, initial=True)
+        self.create_checkbox("Мініфікація SVG", "minify_svg", 15, True, False)
+        self.create_checkbox("Автоматичний розмір блоків", "auto_size", 14, True, False)
+        self.create_checkbox("Режим фокусування", "focused_mode", 12, True, False)
 
         # Додавання кнопки генерації блок-схеми
         self.generate_button = ttk.Button(self.settings_frame, text="Згенерувати блок-схему", command=self.generate_flowchart)
@@ -57,6 +93,19 @@ class FlowchartApp:
         self.input_text.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
         self.input_text.bind("<<Modified>>", self.on_input_modified)
         self.input_text.bind("<Button-3>", self.show_input_context_menu)
+        self.input_text.bind("<ButtonRelease-1>", self.on_cursor_moved)
+        self.input_text.bind("<KeyRelease>", self.on_cursor_moved)
+        self.input_text.tag_configure("error_line", background="#ffd6d6")
+        self.status_label = ttk.Label(self.editor_frame, text="", foreground="red", wraplength=600)
+        self.status_label.grid(row=2, column=0, sticky="w", padx=5)
+
+        # Фрейм списку функцій
+        self.outline_frame = ttk.Frame(self.root, padding="10")
+        self.outline_frame.grid(row=1, column=0, sticky="nsew")
+        ttk.Label(self.outline_frame, text="Функції", font=("Arial", 14, "bold")).grid(row=0, column=0, pady=10)
+        self.outline_list = tk.Listbox(self.outline_frame, height=10, exportselection=False)
+        self.outline_list.grid(row=1, column=0, sticky="nsew")
+        self.outline_list.bind("<<ListboxSelect>>", self.on_outline_select)
 
         # Фрейм виводу
         ttk.Label(self.output_frame, text="Перегляд блок-схеми", font=("Arial", 14, "bold")).grid(row=0, column=0, pady=10)
@@ -82,6 +131,8 @@ class FlowchartApp:
         self.root.grid_columnconfigure(1, weight=1)
         self.root.grid_columnconfigure(2, weight=1)
         self.output_frame.grid_rowconfigure(1, weight=1)
+        self.outline_frame.grid_rowconfigure(1, weight=1)
+        self.outline_frame.grid_columnconfigure(0, weight=1)
         self.output_frame.grid_columnconfigure(0, weight=1)
         self.editor_frame.grid_rowconfigure(1, weight=1)
         self.editor_frame.grid_columnconfigure(0, weight=1)
@@ -99,6 +150,7 @@ class FlowchartApp:
         menu_bar.add_cascade(label="Експортувати", menu=export_menu)
         export_menu.add_command(label="Зберегти AST", command=self.save_ast)
         export_menu.add_command(label="Зберегти DOT", command=self.save_dot)
+        export_menu.add_command(label="Пакетний експорт...", command=self.batch_export)
 
     # Створення spinbox
     def create_spinbox(self, label, setting_name, row, from_, to_, increment=1):
@@ -116,10 +168,12 @@ class FlowchartApp:
         checkbox.grid(row=row, column=0, columnspan=2, sticky="w", pady=5)
         if setting_name == "auto_update":
             var.trace_add("write", self.update_auto_update)
+        elif setting_name == "focused_mode":
+            var.trace_add("write", lambda *args: setattr(self, "focused_mode", var.get()))
 
     # Оновлення налаштувань
     def update_setting(self, setting_name, value):
-        if setting_name in ["online_mode", "edge_arrows", "loopback_arrows", "auto_update"]:
+        if setting_name in ["online_mode", "edge_arrows", "loopback_arrows", "auto_update", "minify_svg", "auto_size", "focused_mode"]:
             value = bool(value) if value in [True, False] else value
         else:
             value = float(value) if "." in str(value) else int(value)
@@ -127,13 +181,17 @@ class FlowchartApp:
         if self.auto_update:
             self.schedule_update()
 
-    # Планування оновлення з затримкою
+    # Планування оновлення з затримкою, що залежить від тривалості попередніх генерацій коду схожого розміру
     def schedule_update(self, setting_name=None, value=None):
         if setting_name:
             self.update_setting(setting_name, value)
         if self.update_id:
             self.root.after_cancel(self.update_id)
-        self.update_id = self.root.after(250, self.generate_flowchart)
+        if self.focused_mode:
+            delay = self.focused_scheduler.delay(self.focused_size)
+        else:
+            delay = self.scheduler.delay(len(self.input_text.get(1.0, tk.END)))
+        self.update_id = self.root.after(int(delay * 1000), self.generate_flowchart)
 
     # Оновлення автоматичного оновлення
     def update_auto_update(self, *args):
@@ -151,11 +209,187 @@ class FlowchartApp:
             self.highlight_text()
             self.generate_flowchart()
 
-    # Генерація блок-схеми
+    # Генерація блок-схеми у фоновому потоці.
+    # Якщо генерація вже виконується, проміжні стани коду пропускаються: після її завершення
+    # запускається одна генерація для актуального коду
     def generate_flowchart(self):
+        if self.update_id:
+            self.root.after_cancel(self.update_id)
+            self.update_id = None
+        if self.generation_thread is not None:
+            self.pending_generation = True
+            return
+        self.pending_generation = False
         c_code = self.input_text.get(1.0, tk.END)
-        dot_output, image_path = generate_flowchart(c_code)
-        self.display_image(image_path)
+        cursor_offset = len(self.input_text.get(1.0, tk.INSERT))
+        preview = not self.focused_mode and self.scheduler.wants_preview(len(c_code))
+        settings_key = repr(sorted(global_settings.items()))
+        self.generation_thread = threading.Thread(target=self.run_generation, args=(c_code, cursor_offset, preview, self.focused_mode, settings_key), daemon=True)
+        self.generation_thread.start()
+        self.root.after(30, self.poll_generation)
+
+    # Виконання генерації (у фоновому потоці); результати передаються головному потоку через чергу.
+    # Замість функцій з помилками використовуються їх останні коректні версії; якщо коректна частина коду
+    # та налаштування не змінились, Graphviz не запускається і залишається остання блок-схема.
+    # Для повільних блок-схем спершу будується швидкий перегляд функції під курсором
+    def run_generation(self, c_code, cursor_offset, preview, focused, settings_key):
+        results = self.generation_results
+        try:
+            valid_code, errors = check_functions(c_code, self.last_good_functions)
+            results.put(("errors", errors))
+            function_names = [name for kind, name, start, end in split_top_level(valid_code.encode('utf-8')) if kind == "function" and name]
+            results.put(("outline", function_names))
+            if focused:
+                self.run_focused(c_code, valid_code, function_names, cursor_offset, settings_key)
+                return
+            generation_key = (valid_code, settings_key)
+            if generation_key == self.last_generated or not valid_code.strip():
+                return
+            if preview:
+                self.run_preview(c_code, valid_code, function_names, cursor_offset)
+                # Код змінився під час побудови перегляду - повна блок-схема вже застаріла
+                if self.pending_generation:
+                    return
+            started = time.perf_counter()
+            stats = {}
+            dot_output, image_path = generate_flowchart(valid_code, stats=stats)
+            image = self.load_image(image_path)
+            results.put(("timing", len(c_code), time.perf_counter() - started, False))
+            if "minify_svg" in stats and not errors:
+                results.put(("minified",) + tuple(stats["minify_svg"]))
+            results.put(("image", image, image_path, generation_key))
+        except Exception as e:
+            results.put(("failed", e))
+        finally:
+            results.put(("done",))
+
+    # Перегляд лише функції під курсором: розбирається тільки її код з визначеннями типів
+    def run_preview(self, c_code, valid_code, function_names, cursor_offset):
+        name = function_at(c_code, cursor_offset)
+        preview_code = function_source(valid_code, name) if name else None
+        if preview_code is None:
+            return
+        dot_output, image_path = generate_flowchart(preview_code, function_index=set(function_names), functions={name},
+                                                    output_path=os.path.join(os.getcwd(), 'temp', 'preview'))
+        self.generation_results.put(("image", self.load_image(image_path), image_path, None))
+
+    # Режим фокусування: блок-схема лише функції під курсором (або вибраної у списку функцій).
+    # Блок-схеми функцій кешуються, інші функції будуються лише при їх виборі,
+    # тому затримка визначається розміром однієї функції, а не всього коду
+    def run_focused(self, c_code, valid_code, function_names, cursor_offset, settings_key):
+        name = function_at(c_code, cursor_offset)
+        if name not in function_names:
+            # Курсор поза коректними функціями - залишається попередня функція
+            name = self.focused_function if self.focused_function in function_names else next(iter(function_names), None)
+        if name is None:
+            return
+        generation_key = (valid_code, settings_key, name)
+        if generation_key == self.last_generated:
+            return
+        function_code = function_source(valid_code, name)
+        cache_key = (function_code, tuple(function_names), settings_key)
+        cached = self.focused_cache.get(name)
+        if cached is None or cached[0] != cache_key:
+            started = time.perf_counter()
+            dot_output, image_path = generate_flowchart(function_code, function_index=set(function_names), functions={name},
+                                                        output_path=os.path.join(os.getcwd(), 'temp', 'focus', name))
+            cached = (cache_key, self.load_image(image_path), image_path)
+            self.focused_cache[name] = cached
+            self.generation_results.put(("timing", len(function_code), time.perf_counter() - started, True))
+        self.generation_results.put(("focused", name))
+        self.generation_results.put(("image", cached[1], cached[2], generation_key))
+
+    # Обробка результатів фонової генерації (у головному потоці)
+    def poll_generation(self):
+        while True:
+            try:
+                message = self.generation_results.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "errors":
+                self.show_errors(message[1])
+            elif kind == "timing":
+                size, duration, focused = message[1:]
+                if focused:
+                    self.focused_size = size
+                    self.focused_scheduler.record(size, duration)
+                else:
+                    self.scheduler.record(size, duration)
+            elif kind == "outline":
+                self.update_outline(message[1])
+            elif kind == "focused":
+                self.focused_function = message[1]
+                self.select_outline(message[1])
+            elif kind == "image":
+                image, image_path, generation_key = message[1:]
+                self.show_image(image, image_path)
+                if generation_key is not None:
+                    self.last_generated = generation_key
+                    self.chart_path = image_path
+            elif kind == "minified":
+                # Звіт показується, лише якщо в коді немає помилок (інакше рядок стану зайнятий ними)
+                from svg_minify import format_report
+                self.status_label.config(text=f"Мініфікація SVG: {format_report(*message[1:])}", foreground="gray")
+            elif kind == "failed":
+                self.status_label.config(text=f"Помилка генерації: {message[1]}", foreground="red")
+            elif kind == "done":
+                self.generation_thread = None
+                if self.pending_generation:
+                    self.generate_flowchart()
+                return
+        self.root.after(30, self.poll_generation)
+
+    # Оновлення списку функцій (лише якщо він змінився, щоб не скидати прокрутку та вибір)
+    def update_outline(self, function_names):
+        if list(self.outline_list.get(0, tk.END)) == function_names:
+            return
+        self.outline_list.delete(0, tk.END)
+        for name in function_names:
+            self.outline_list.insert(tk.END, name)
+        if self.focused_function:
+            self.select_outline(self.focused_function)
+
+    # Виділення функції у списку
+    def select_outline(self, name):
+        names = self.outline_list.get(0, tk.END)
+        self.outline_list.selection_clear(0, tk.END)
+        if name in names:
+            self.outline_list.selection_set(names.index(name))
+            self.outline_list.see(names.index(name))
+
+    # Вибір функції у списку: курсор переходить до її заголовка,
+    # у режимі фокусування одразу будується (або береться з кешу) її блок-схема
+    def on_outline_select(self, event):
+        selection = self.outline_list.curselection()
+        if not selection:
+            return
+        name = self.outline_list.get(selection[0])
+        buffer = self.input_text.get(1.0, tk.END).encode('utf-8')
+        for kind, chunk_name, start, end in split_top_level(buffer):
+            if kind == "function" and chunk_name == name:
+                header = end - len(buffer[start:end].lstrip())
+                index = f"1.0 + {len(buffer[:header].decode('utf-8', errors='replace'))} chars"
+                self.input_text.mark_set(tk.INSERT, index)
+                self.input_text.see(index)
+                break
+        if self.focused_mode:
+            self.generate_flowchart()
+
+    # Переміщення курсору: у режимі фокусування показується функція під курсором
+    def on_cursor_moved(self, event):
+        if self.focused_mode and self.auto_update:
+            self.schedule_update()
+
+    # Позначення функцій з помилками розбору
+    def show_errors(self, errors):
+        self.input_text.tag_remove("error_line", "1.0", tk.END)
+        messages = []
+        for name, line, column, message in errors:
+            self.input_text.tag_add("error_line", f"{line}.0", f"{line}.end")
+            location = f"рядок {line}" + (f":{column}" if column else "")
+            messages.append(f"Помилка у {f'функції {name}' if name else 'оголошенні'}, {location}: {message}")
+        self.status_label.config(text="\n".join(messages), foreground="red")
 
     # Збереження як
     def save_as(self):
@@ -170,7 +404,7 @@ class FlowchartApp:
 
     # Збереження DOT
     def save_dot(self):
-        self.save_file('flowchart.dot', 'DOT')
+        self.save_file(f"{os.path.splitext(self.chart_path)[0]}.dot" if self.chart_path else 'flowchart.dot', 'DOT')
 
     # Збереження файлу
     def save_file(self, temp_filename, file_label):
@@ -187,7 +421,7 @@ class FlowchartApp:
     # Збереження блок-схеми
     def save_flowchart(self, format, file_path=None):
         temp_dir = os.path.join(os.getcwd(), 'temp')
-        temp_file_path = os.path.join(temp_dir, 'flowchart.svg')
+        temp_file_path = self.chart_path or os.path.join(temp_dir, 'flowchart.svg')
         if not os.path.exists(temp_file_path):
             messagebox.showerror("Помилка", f"Не знайдено SVG файл для збереження.")
             return
@@ -195,40 +429,85 @@ class FlowchartApp:
             file_path = filedialog.asksaveasfilename(defaultextension=f".{format}", filetypes=[(f'{format.upper()} files', f'*.{format}'), ('All files', '*.*')])
         if file_path:
             try:
+                import cairosvg
+                from export import rasterize
+                # Растрові формати використовують вже растеризоване зображення повної блок-схеми
+                image = self.image if self.image_source == temp_file_path else None
                 if format == 'jpg':
-                    png_path = temp_file_path.replace(".svg", ".png")
-                    cairosvg.svg2png(url=temp_file_path, write_to=png_path)
-                    image = Image.open(png_path)
-                    image = image.convert('RGB')
-                    image.save(file_path, 'JPEG')
+                    image = image or rasterize(temp_file_path)
+                    image.convert('RGB').save(file_path, 'JPEG')
                 elif format == 'pdf':
-                    pdf_path = temp_file_path.replace(".svg", ".pdf")
-                    cairosvg.svg2pdf(url=temp_file_path, write_to=pdf_path)
-                    shutil.copy(pdf_path, file_path)
+                    cairosvg.svg2pdf(url=temp_file_path, write_to=file_path)
                 elif format == 'png':
-                    png_path = temp_file_path.replace(".svg", ".png")
-                    cairosvg.svg2png(url=temp_file_path, write_to=png_path)
-                    shutil.copy(png_path, file_path)
+                    image = image or rasterize(temp_file_path)
+                    image.save(file_path, 'PNG')
                 else:
                     shutil.copy(temp_file_path, file_path)
                 messagebox.showinfo("Успіх", f"Файл {format.upper()} збережено успішно.")
             except Exception as e:
                 messagebox.showerror("Помилка", f"Не вдалося зберегти {format.upper()} файл: {e}")
 
-    # Відображення зображення
-    def display_image(self, image_path):
-        if image_path.endswith(".svg"):
-            png_path = image_path.replace(".svg", ".png")
-            cairosvg.svg2png(url=image_path, write_to=png_path)
-            image_path = png_path
+    # Пакетний експорт блок-схем усіх функцій вибраних файлів (PNG, SVG та багатосторінковий PDF)
+    def batch_export(self):
+        c_paths = filedialog.askopenfilenames(filetypes=[("C files", "*.c"), ("All files", "*.*")])
+        if not c_paths:
+            return
+        output_dir = filedialog.askdirectory(title="Каталог для експорту")
+        if not output_dir:
+            return
+        if self.export_thread is not None:
+            messagebox.showinfo("Експорт", "Пакетний експорт уже виконується.")
+            return
+        self.status_label.config(text="Пакетний експорт...", foreground="gray")
+        self.export_thread = threading.Thread(target=self.run_batch_export, args=(list(c_paths), output_dir), daemon=True)
+        self.export_thread.start()
+        self.root.after(100, self.poll_export)
+
+    # Виконання пакетного експорту (у фоновому потоці); результат передається головному потоку через чергу
+    def run_batch_export(self, c_paths, output_dir):
+        from export import export_files
+        try:
+            results = export_files(c_paths, output_dir)
+            self.export_results.put(("exported", sum(len(written) for written in results.values())))
+        except Exception as e:
+            self.export_results.put(("failed", e))
+
+    # Обробка результату пакетного експорту (у головному потоці)
+    def poll_export(self):
+        try:
+            kind, result = self.export_results.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self.poll_export)
+            return
+        self.export_thread = None
+        if kind == "exported":
+            self.status_label.config(text=f"Експортовано {result} файлів", foreground="gray")
+            messagebox.showinfo("Успіх", f"Експортовано {result} файлів.")
+        else:
+            self.status_label.config(text="Помилка пакетного експорту", foreground="red")
+            messagebox.showerror("Помилка", f"Не вдалося виконати пакетний експорт: {result}")
 
-        self.image = Image.open(image_path)
+    # Завантаження зображення з растеризацією SVG (може виконуватись у фоновому потоці)
+    def load_image(self, image_path):
+        from PIL import Image
+        if image_path.endswith(".svg"):
+            from export import rasterize
+            return rasterize(image_path)
+        image = Image.open(image_path)
+        image.load()
+        return image
+
+    # Показ готового зображення на полотні
+    def show_image(self, image, image_path):
+        self.image = image
+        self.image_source = image_path
         self.update_canvas_image(center_image=True)
 
     # Оновлення зображення на полотні
     def update_canvas_image(self, center_image=False):
         if self.image is None:
             return
+        from PIL import Image, ImageTk
         
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
@@ -281,6 +560,8 @@ class FlowchartApp:
 
     # Налаштування тегів для підсвічування
     def setup_tags(self):
+        from pygments.styles import get_style_by_name
+        self.style = get_style_by_name("default")  # Використання стандартного стилю
         for token, style in self.style:
             foreground = style['color']
             if foreground:
@@ -288,6 +569,10 @@ class FlowchartApp:
 
     # Підсвічування тексту коду
     def highlight_text(self):
+        from pygments import lex
+        from pygments.lexers import CLexer
+        if self.style is None:
+            self.setup_tags()
         c_code = self.input_text.get("1.0", tk.END)
         self.input_text.mark_set("range_start", "1.0")
         for token, content in lex(c_code, CLexer()):
@@ -328,6 +613,14 @@ class FlowchartApp:
         self.canvas.delete("all")
 
 if __name__ == "__main__":
+    import sys
     root = tk.Tk()
     app = FlowchartApp(root)
-    root.mainloop()
+    root.after_idle(app.start_warm_up)
+    # Вимірювання часу до появи вікна (використовується startup_benchmark.py)
+    if "--startup-time" in sys.argv:
+        root.update()
+        print(f"window shown: {(time.perf_counter() - startup_time) * 1000:.1f} ms")
+        root.destroy()
+    else:
+        root.mainloop()
@@ -0,0 +1,253 @@
+# Проєктний режим: побудова блок-схем для всіх файлів C проєкту зі спільним індексом функцій
+from flowchart_generator import preprocess_code, parse_code, generate_flowchart, update_global_settings, global_settings, function_sources
+
+# Версія формату індексу (при зміні формату індекс перебудовується повністю)
+INDEX_VERSION = 1
+
+# Пошук файлів C у каталозі проєкту
+def find_sources(root):
+    import os
+    sources = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        # Пропуск прихованих каталогів та каталогу з результатами
+        dir_names[:] = sorted(name for name in dir_names if not name.startswith('.') and name != 'temp')
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith('.c'):
+                sources.append(os.path.join(dir_path, file_name))
+    return sources
+
+# Хеш тексту
+def text_hash(text):
+    import hashlib
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+# Хеш налаштувань (зміна налаштувань змінює вигляд усіх блок-схем)
+def settings_hash(settings):
+    import json
+    return text_hash(json.dumps(settings, sort_keys=True, default=str))
+
+# Індексація одного файлу: визначення функцій, їх хешів та викликів (виконується у процесі-воркері)
+def index_file(path):
+    import os
+    from pycparser import c_ast
+
+    stat = os.stat(path)
+    entry = {"mtime": stat.st_mtime, "size": stat.st_size, "functions": {}, "error": None}
+    try:
+        with open(path, 'r', encoding='utf-8') as source_file:
+            c_code = preprocess_code(source_file.read())
+        ast = parse_code(c_code)
+    except Exception as e:
+        entry["error"] = str(e)
+        return entry
+
+    # Збирач імен функцій, що викликаються у тілі
+    class CallVisitor(c_ast.NodeVisitor):
+        def __init__(self):
+            self.calls = set()
+
+        def visit_FuncCall(self, node):
+            if isinstance(node.name, c_ast.ID):
+                self.calls.add(node.name.name)
+            self.generic_visit(node)
+
+    # Текст функції - від її оголошення до наступного елемента верхнього рівня
+    lines = c_code.split('\n')
+    starts = [ext.coord.line for ext in ast.ext if ext.coord] + [len(lines) + 1]
+    for ext in ast.ext:
+        if isinstance(ext, c_ast.FuncDef):
+            start = ext.coord.line
+            end = min(line for line in starts if line > start)
+            visitor = CallVisitor()
+            visitor.visit(ext.body)
+            entry["functions"][ext.decl.name] = {
+                "line": start,
+                # Коментарі замінені пробілами, тому хеш береться без урахування пробільних символів
+                "hash": text_hash(" ".join("\n".join(lines[start - 1:end - 1]).split())),
+                "calls": sorted(visitor.calls)
+            }
+    return entry
+
+# Завантаження індексу з диску
+def load_index(index_path):
+    import json
+    import os
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as index_file_obj:
+            index = json.load(index_file_obj)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    return {"version": INDEX_VERSION, "settings": None, "files": {}}
+
+# Атомарне збереження індексу на диск
+def save_index(index, index_path):
+    import json
+    import os
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    temp_path = f"{index_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as index_file_obj:
+        json.dump(index, index_file_obj, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temp_path, index_path)
+
+# Інкрементальне оновлення індексу: переіндексуються лише змінені файли, паралельно
+def build_index(root, old_index, workers=None):
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    files = {}
+    stale = []
+    for path in find_sources(root):
+        rel_path = os.path.relpath(path, root).replace(os.sep, '/')
+        old_entry = old_index["files"].get(rel_path)
+        stat = os.stat(path)
+        if old_entry and old_entry["mtime"] == stat.st_mtime and old_entry["size"] == stat.st_size:
+            files[rel_path] = old_entry
+        else:
+            stale.append((rel_path, path))
+
+    if len(stale) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(index_file, [path for rel_path, path in stale]))
+    else:
+        entries = [index_file(path) for rel_path, path in stale]
+    for (rel_path, path), entry in zip(stale, entries):
+        # Файл, що не розбирається (наприклад, збережений посеред редагування), зберігає функції
+        # попереднього запису, щоб їх блок-схеми не вважались видаленими
+        old_entry = old_index["files"].get(rel_path)
+        if entry["error"] and old_entry:
+            entry["functions"] = old_entry["functions"]
+        files[rel_path] = entry
+
+    return {"version": INDEX_VERSION, "settings": settings_hash(global_settings), "files": files}
+
+# Множина імен усіх функцій проєкту
+def global_function_names(index):
+    names = set()
+    for entry in index["files"].values():
+        names.update(entry["functions"])
+    return names
+
+# Визначення змінених функцій: {файл: {імена}}
+# Функція вважається зміненою, якщо змінився її текст, налаштування,
+# або функція, яку вона викликає, з'явилась чи зникла у проєкті
+def changed_functions(old_index, new_index):
+    old_names = global_function_names(old_index)
+    new_names = global_function_names(new_index)
+    toggled = old_names ^ new_names
+    all_changed = old_index.get("settings") != new_index.get("settings")
+
+    changed = {}
+    for rel_path, entry in new_index["files"].items():
+        old_functions = old_index["files"].get(rel_path, {}).get("functions", {})
+        for name, info in entry["functions"].items():
+            old_info = old_functions.get(name)
+            if all_changed or old_info is None or old_info["hash"] != info["hash"] or toggled.intersection(info["calls"]):
+                changed.setdefault(rel_path, set()).add(name)
+    return changed
+
+# Визначення видалених функцій: {файл: {імена}}
+def removed_functions(old_index, new_index):
+    removed = {}
+    for rel_path, entry in old_index["files"].items():
+        new_functions = new_index["files"].get(rel_path, {}).get("functions", {})
+        names = set(entry["functions"]) - set(new_functions)
+        if names:
+            removed[rel_path] = names
+    return removed
+
+# Шлях до блок-схеми функції (без розширення)
+def chart_path(output_dir, rel_path, function_name):
+    import os
+    return os.path.join(output_dir, os.path.splitext(rel_path)[0], function_name)
+
+# Генерація блок-схем вибраних функцій одного файлу (виконується у процесі-воркері)
+# Файл розбивається на функції один раз, і кожна функція розбирається окремо (з визначеннями типів),
+# а не весь файл для кожної функції.
+# Результати спочатку записуються у тимчасові файли і атомарно замінюють попередні,
+# щоб читачі (збірка документації, переглядач) ніколи не бачили частково записаних файлів
+def render_file(path, names, function_index, output_dir, rel_path, settings):
+    import os
+    update_global_settings(settings)
+    with open(path, 'rb') as source_file:
+        buffer = source_file.read()
+    for name, c_code in function_sources(buffer, names):
+        target_path = chart_path(output_dir, rel_path, name)
+        temp_path = os.path.join(os.path.dirname(target_path), f".{name}.tmp")
+        generate_flowchart(c_code, function_index=function_index, functions={name}, output_path=temp_path)
+        os.replace(f"{temp_path}.dot", f"{target_path}.dot")
+        os.replace(f"{temp_path}.svg", f"{target_path}.svg")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+# Оновлення блок-схем проєкту: генеруються лише змінені функції, повертає {файл: {імена}}
+def update_project(root, output_dir=None, workers=None, force=False):
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    output_dir = output_dir or os.path.join(os.getcwd(), 'temp', 'project')
+    index_path = os.path.join(output_dir, 'index.json')
+    old_index = load_index(index_path)
+    if force:
+        old_index = {"version": INDEX_VERSION, "settings": None, "files": {}}
+    new_index = build_index(root, old_index, workers)
+    for rel_path, entry in sorted(new_index["files"].items()):
+        if entry["error"] and entry is not old_index["files"].get(rel_path):
+            print(f"Помилка розбору {rel_path}: {entry['error']}")
+    changed = changed_functions(old_index, new_index)
+    function_index = global_function_names(new_index)
+
+    jobs = [(os.path.join(root, rel_path), names, function_index, output_dir, rel_path, dict(global_settings))
+            for rel_path, names in sorted(changed.items())]
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_file, *job) for job in jobs]
+            errors = [future.exception() for future in futures]
+    else:
+        errors = []
+        for job in jobs:
+            try:
+                render_file(*job)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+
+    # Файли з помилками генерації залишаються зі старим записом, щоб бути переобробленими наступного разу
+    for job, error in zip(jobs, errors):
+        if error is not None:
+            rel_path = job[4]
+            changed.pop(rel_path, None)
+            if rel_path in old_index["files"]:
+                new_index["files"][rel_path] = old_index["files"][rel_path]
+            else:
+                new_index["files"].pop(rel_path)
+            print(f"Не вдалося згенерувати блок-схеми для {rel_path}: {error}")
+
+    # Видалення блок-схем функцій, яких більше немає
+    for rel_path, names in removed_functions(old_index, new_index).items():
+        for name in names:
+            for extension in ('.svg', '.dot'):
+                stale_path = chart_path(output_dir, rel_path, name) + extension
+                if os.path.isfile(stale_path):
+                    os.remove(stale_path)
+
+    save_index(new_index, index_path)
+    return changed
+
+# Запуск проєктного режиму з командного рядка
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Генерація блок-схем для всіх файлів C проєкту")
+    parser.add_argument("root", help="Каталог проєкту")
+    parser.add_argument("-o", "--output", default=None, help="Каталог для блок-схем (за замовчуванням temp/project)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Кількість процесів")
+    parser.add_argument("--force", action="store_true", help="Перегенерувати всі функції")
+    args = parser.parse_args()
+
+    changed = update_project(args.root, args.output, args.jobs, args.force)
+    for rel_path, names in sorted(changed.items()):
+        print(f"{rel_path}: {', '.join(sorted(names))}")
+    if not changed:
+        print("Змін не знайдено")
+
+if __name__ == "__main__":
+    main()
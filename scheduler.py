@@ -0,0 +1,45 @@
+# Адаптивне планування перегенерації блок-схеми: затримка після редагування
+# підбирається за тривалістю попередніх запусків для коду схожого розміру
+
+class GenerationScheduler:
+    def __init__(self, default_delay=0.25, min_delay=0.03, max_delay=1.5, delay_factor=1.5, smoothing=0.3, preview_threshold=0.3):
+        self.default_delay = default_delay  # Затримка, поки немає вимірювань, с
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay_factor = delay_factor  # Затримка відносно очікуваної тривалості генерації
+        self.smoothing = smoothing  # Вага нового вимірювання в експоненційному середньому
+        self.preview_threshold = preview_threshold  # Тривалість повної генерації, з якої спершу будується перегляд функції, с
+        self.durations = {}  # кошик розміру коду -> середня тривалість повної генерації, с
+
+    # Кошик розміру коду (степені двійки), щоб близькі розміри мали спільну оцінку
+    @staticmethod
+    def bucket(size):
+        return max(size, 1).bit_length()
+
+    # Запис тривалості повної генерації (експоненційне згладжування)
+    def record(self, size, duration):
+        bucket = self.bucket(size)
+        previous = self.durations.get(bucket)
+        self.durations[bucket] = duration if previous is None else previous + self.smoothing * (duration - previous)
+
+    # Очікувана тривалість запуску (None, якщо вимірювань ще немає).
+    # Для розміру без вимірювань береться найближчий кошик з лінійним масштабуванням
+    def estimate(self, size):
+        if not self.durations:
+            return None
+        bucket = self.bucket(size)
+        nearest = min(self.durations, key=lambda known_bucket: abs(known_bucket - bucket))
+        return self.durations[nearest] * 2.0 ** (bucket - nearest)
+
+    # Затримка перед генерацією: швидкі запуски виконуються майже одразу,
+    # повільні чекають довше, щоб серія натискань клавіш об'єдналась в один запуск
+    def delay(self, size):
+        expected = self.estimate(size)
+        if expected is None:
+            return self.default_delay
+        return min(max(expected * self.delay_factor, self.min_delay), self.max_delay)
+
+    # Чи варто спершу побудувати перегляд лише функції під курсором
+    def wants_preview(self, size):
+        expected = self.estimate(size)
+        return expected is not None and expected >= self.preview_threshold
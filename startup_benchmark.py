@@ -0,0 +1,73 @@
+# Вимірювання часу холодного старту інтерфейсу (розбивка в стилі -X importtime)
+import os
+import re
+import subprocess
+import sys
+
+# Рядок виводу -X importtime: "import time: self [us] | cumulative | imported package"
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)')
+
+# Запуск імпорту модуля в новому інтерпретаторі; повертає список (модуль, власний час, сукупний час, рівень вкладеності) у мкс
+def measure_imports(module="gui"):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return imports
+
+# Запуск інтерфейсу до появи вікна; повертає час у мс (None, якщо немає дисплея)
+def measure_window(runs=1):
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "gui.py", "--startup-time"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        match = re.search(r'window shown: ([\d.]+) ms', result.stdout)
+        if not match:
+            return None
+        timings.append(float(match.group(1)))
+    return min(timings)
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Вимірювання часу холодного старту інтерфейсу")
+    parser.add_argument("--top", type=int, default=15, help="Кількість найповільніших імпортів у звіті")
+    parser.add_argument("--budget", type=float, default=None, help="Допустимий час імпорту gui, мс (перевищення - код виходу 1)")
+    parser.add_argument("--runs", type=int, default=3, help="Кількість запусків (береться найкращий)")
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        imports = measure_imports()
+        total = sum(cumulative for name, self_us, cumulative, level in imports if name == "gui")
+        if best is None or total < best[0]:
+            best = (total, imports)
+    total, imports = best
+
+    print(f"Імпорт gui: {total / 1000:.1f} мс")
+    print(f"{'сукупно, мс':>12} {'власний, мс':>12}  модуль")
+    # Модулі, що завантажуються інтерпретатором до імпорту gui (site тощо), не враховуються
+    # (вкладені імпорти виводяться перед батьківським модулем)
+    gui_index = next(index for index, item in enumerate(imports) if item[0] == "gui")
+    first_index = gui_index
+    while first_index > 0 and imports[first_index - 1][3] > 0:
+        first_index -= 1
+    gui_imports = imports[first_index:gui_index + 1]
+    for name, self_us, cumulative, level in sorted(gui_imports, key=lambda item: item[2], reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:>12.1f} {self_us / 1000:>12.1f}  {'  ' * level}{name}")
+
+    window_ms = measure_window(args.runs)
+    if window_ms is not None:
+        print(f"Поява вікна: {window_ms:.1f} мс")
+
+    if args.budget is not None and total / 1000 > args.budget:
+        print(f"Перевищено бюджет {args.budget:.1f} мс")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Мініфікація SVG, створеного Graphviz: видалення невидимих допоміжних блоків,
+# перенесення повторюваних стилів у CSS-класи та скорочення точності чисел
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+# Атрибути оформлення, що переносяться у CSS-класи
+STYLE_ATTRIBUTES = ("fill", "stroke", "stroke-width", "stroke-dasharray", "font-family", "font-size", "font-weight", "font-style", "text-anchor")
+
+# Властивості-довжини: у CSS, на відміну від атрибутів SVG, число без одиниць некоректне
+LENGTH_PROPERTIES = ("font-size", "stroke-width")
+
+# Атрибути з координатами, точність яких скорочується
+NUMERIC_ATTRIBUTES = ("points", "d", "x", "y", "cx", "cy", "rx", "ry", "width", "height", "viewBox", "transform", "font-size", "stroke-width")
+
+# Скорочення точності всіх дробових чисел у рядку
+def round_numbers(value, precision):
+    import re
+
+    def shorten(match):
+        number = f"{float(match.group()):.{precision}f}"
+        if "." in number:
+            number = number.rstrip("0").rstrip(".")
+        return "0" if number in ("-0", "") else number
+
+    return re.sub(r'-?\d+\.\d+', shorten, value)
+
+# Значення атрибута як значення властивості CSS (до чисел-довжин додається px)
+def css_value(name, value, precision):
+    import re
+    value = round_numbers(value, precision)
+    if name in LENGTH_PROPERTIES and re.fullmatch(r'-?\d+(?:\.\d+)?', value.strip()):
+        return f"{value.strip()}px"
+    return value
+
+# Мініфікація SVG-файлу; повертає (розмір до, розмір після) у байтах
+def minify_svg(svg_path, output_path=None, precision=1):
+    import os
+    import xml.etree.ElementTree as ET
+
+    ET.register_namespace('', SVG_NS)
+    ET.register_namespace('xlink', XLINK_NS)
+    output_path = output_path or svg_path
+    original_size = os.path.getsize(svg_path)
+
+    # Коментарі та DOCTYPE відкидаються парсером
+    tree = ET.parse(svg_path)
+    root = tree.getroot()
+    g_tag = f"{{{SVG_NS}}}g"
+    title_tag = f"{{{SVG_NS}}}title"
+
+    # Видалення невидимих допоміжних блоків (точки згину з style=invis): групи без графічних елементів
+    for parent in root.iter():
+        for child in list(parent):
+            if child.tag == g_tag and child.get("class") == "node" and all(element.tag == title_tag for element in child):
+                parent.remove(child)
+
+    # Підрахунок повторюваних комбінацій стилів
+    style_counts = {}
+    for element in root.iter():
+        if element.tag == g_tag or element is root:
+            continue
+        style = tuple((name, element.get(name)) for name in STYLE_ATTRIBUTES if element.get(name) is not None)
+        if style:
+            style_counts[style] = style_counts.get(style, 0) + 1
+
+    style_classes = {}
+    for element in root.iter():
+        if element is not root:
+            style = tuple((name, element.get(name)) for name in STYLE_ATTRIBUTES if element.get(name) is not None)
+            if element.tag != g_tag and style_counts.get(style, 0) > 1:
+                if style not in style_classes:
+                    style_classes[style] = f"s{len(style_classes)}"
+                for name, value in style:
+                    del element.attrib[name]
+                existing_class = element.get("class")
+                element.set("class", f"{existing_class} {style_classes[style]}" if existing_class else style_classes[style])
+        for name in NUMERIC_ATTRIBUTES:
+            value = element.get(name)
+            if value is not None:
+                element.set(name, round_numbers(value, precision))
+
+    # Спільні CSS-класи на початку документа
+    if style_classes:
+        rules = []
+        for style, class_name in style_classes.items():
+            declarations = ";".join(f"{name}:{css_value(name, value, precision)}" for name, value in style)
+            rules.append(f".{class_name}{{{declarations}}}")
+        style_element = ET.Element(f"{{{SVG_NS}}}style")
+        style_element.text = "".join(rules)
+        root.insert(0, style_element)
+
+    # Видалення форматувальних пробілів між елементами
+    for element in root.iter():
+        if len(element) and element.text and not element.text.strip():
+            element.text = None
+        if element.tail and not element.tail.strip():
+            element.tail = None
+
+    temp_path = f"{output_path}.tmp"
+    tree.write(temp_path, encoding="utf-8", xml_declaration=False)
+    os.replace(temp_path, output_path)
+    return original_size, os.path.getsize(output_path)
+
+# Текстовий звіт про зменшення розміру
+def format_report(original_size, minified_size):
+    saved = original_size - minified_size
+    percent = saved * 100 / original_size if original_size else 0
+    return f"{original_size} -> {minified_size} байт (-{saved} байт, -{percent:.1f}%)"
+
+# Мініфікація SVG-файлів з командного рядка
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Мініфікація SVG-файлів блок-схем")
+    parser.add_argument("files", nargs="+", help="SVG-файли (змінюються на місці)")
+    parser.add_argument("-p", "--precision", type=int, default=1, help="Кількість знаків після коми")
+    args = parser.parse_args()
+    for svg_path in args.files:
+        print(f"{svg_path}: {format_report(*minify_svg(svg_path, precision=args.precision))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# Режим спостереження: автоматичне оновлення блок-схем при зміні файлів C у каталозі
+from project import update_project
+
+# Маски подій inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+# Перевірка, чи стосується зміна вихідного коду
+def is_source_path(path):
+    return path.lower().endswith('.c')
+
+# Перевірка, чи потрібно спостерігати за каталогом
+def is_watched_dir(name):
+    return not name.startswith('.') and name != 'temp'
+
+# Спостереження через inotify: процес спить у select до появи подій
+class InotifyWatcher:
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+        import os
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.add_tree(root)
+
+    # Додавання спостереження за каталогом та всіма його підкаталогами
+    def add_tree(self, root):
+        import ctypes
+        import os
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names[:] = [name for name in dir_names if is_watched_dir(name)]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir_path}")
+            self.watches[wd] = dir_path
+
+    # Очікування подій; повертає множину змінених шляхів (порожню після тайм-ауту)
+    def wait(self, timeout=None):
+        import os
+        import select
+        import struct
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = struct.unpack_from('iIII', data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b'\0')
+            offset += 16 + length
+            if mask & IN_Q_OVERFLOW:
+                # Черга переповнена - невідомо, що змінилось
+                changed.add('')
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            dir_path = self.watches.get(wd)
+            if dir_path is None:
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name)) if name else dir_path
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and is_watched_dir(os.path.basename(path)):
+                    self.add_tree(path)
+                    changed.add(path)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    changed.add(path)
+            elif is_source_path(path):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        import os
+        os.close(self.fd)
+
+# Спостереження опитуванням: порівняння часу зміни та розміру файлів з заданим інтервалом
+class PollingWatcher:
+    def __init__(self, root, interval=1.0):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    # Знімок стану файлів C
+    def scan(self):
+        import os
+        snapshot = {}
+        for dir_path, dir_names, file_names in os.walk(self.root):
+            dir_names[:] = [name for name in dir_names if is_watched_dir(name)]
+            for file_name in file_names:
+                if is_source_path(file_name):
+                    path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    # Очікування змін; повертає множину змінених шляхів (порожню після тайм-ауту)
+    def wait(self, timeout=None):
+        import time
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, max(0, deadline - time.monotonic()))
+            time.sleep(delay)
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+# Створення спостерігача: inotify, якщо доступний, інакше опитування
+def create_watcher(root, poll_interval=1.0, polling=False):
+    import sys
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"inotify недоступний ({e}), використовується опитування")
+    return PollingWatcher(root, poll_interval)
+
+# Спостереження за каталогом: швидкі послідовні збереження об'єднуються,
+# перегенеровуються лише функції, змінені з часу попереднього запуску
+def watch(root, output_dir=None, debounce=0.5, workers=None, poll_interval=1.0, polling=False):
+    watcher = create_watcher(root, poll_interval, polling)
+    try:
+        report(update_project(root, output_dir, workers))
+        while True:
+            if not watcher.wait():
+                continue
+            # Очікування паузи у змінах
+            while watcher.wait(debounce):
+                pass
+            try:
+                report(update_project(root, output_dir, workers))
+            except Exception as e:
+                print(f"Помилка оновлення блок-схем: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+# Виведення списку оновлених функцій
+def report(changed):
+    import time
+    for rel_path, names in sorted(changed.items()):
+        print(f"[{time.strftime('%H:%M:%S')}] {rel_path}: {', '.join(sorted(names))}")
+
+# Запуск режиму спостереження з командного рядка
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Автоматичне оновлення блок-схем при зміні файлів C")
+    parser.add_argument("root", help="Каталог проєкту")
+    parser.add_argument("-o", "--output", default=None, help="Каталог для блок-схем (за замовчуванням temp/project)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Кількість процесів")
+    parser.add_argument("--debounce", type=float, default=0.5, help="Пауза у змінах перед оновленням, с")
+    parser.add_argument("--poll", action="store_true", help="Використовувати опитування замість inotify")
+    parser.add_argument("--interval", type=float, default=1.0, help="Інтервал опитування, с")
+    args = parser.parse_args()
+    watch(args.root, args.output, args.debounce, args.jobs, args.interval, args.poll)
+
+if __name__ == "__main__":
+    main()